@@ -3,11 +3,12 @@ Database schema and access for user-defined coatings.
 Uses SQLite (built-in) for persistence.
 """
 
+import itertools
 import json
 import os
 import sqlite3
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 # Database path: project root / data / coatings.db
 _ROOT = Path(__file__).resolve().parent
@@ -32,11 +33,27 @@ CREATE INDEX IF NOT EXISTS idx_user_coating_name ON user_coating(name);
 """
 
 
+# DB file whose schema this process has already created. Coatings are read on every
+# trace, so the mkdir + CREATE IF NOT EXISTS script runs once rather than per query.
+_schema_ready_path: Optional[str] = None
+
+# Sequence number of the last insert from this process (see user_coatings_version);
+# drawn from a counter so concurrent inserts never reuse a value.
+_write_seq = itertools.count(1)
+_writes = 0
+
+
 def _get_conn() -> sqlite3.Connection:
-    _DATA_DIR.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(_DB_PATH))
+    global _schema_ready_path
+    db_path = str(_DB_PATH)
+    needs_schema = _schema_ready_path != db_path or not os.path.exists(db_path)
+    if needs_schema:
+        _DATA_DIR.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
-    conn.executescript(SCHEMA)
+    if needs_schema:
+        conn.executescript(SCHEMA)
+        _schema_ready_path = db_path
     return conn
 
 
@@ -45,6 +62,19 @@ def init_db() -> None:
     _get_conn().close()
 
 
+def user_coatings_version() -> Tuple[int, int, int]:
+    """
+    Cheap change marker for the user coatings, for keying caches without reading the
+    table: (writes from this process, DB file mtime in ns, DB file size). The file
+    stat also catches writes from other processes; (0, 0, 0) before the DB exists.
+    """
+    try:
+        st = os.stat(_DB_PATH)
+    except FileNotFoundError:
+        return _writes, 0, 0
+    return _writes, st.st_mtime_ns, st.st_size
+
+
 def get_coating_by_name(name: str) -> Optional[Dict[str, Any]]:
     """Return a single user coating by name, or None if not found."""
     conn = _get_conn()
@@ -111,6 +141,7 @@ def insert_user_coating(
     is_hr: bool = False,
 ) -> Dict[str, Any]:
     """Insert a new user coating. Returns the created record."""
+    global _writes
     conn = _get_conn()
     try:
         conn.execute(
@@ -129,6 +160,7 @@ def insert_user_coating(
             ),
         )
         conn.commit()
+        _writes = next(_write_seq)
         row_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
         cur = conn.execute(
             "SELECT id, name, category, data_type, constant_value, data_points, description, is_hr FROM user_coating WHERE id = ?",
@@ -5,7 +5,9 @@ Loads from glass_library.json; used by trace_service for wavelength-dependent re
 
 import json
 import os
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
 
 _backend_dir = os.path.dirname(os.path.abspath(__file__))
 _LIBRARY_PATH = os.path.join(_backend_dir, "glass_library.json")
@@ -75,30 +77,60 @@ def n_from_sellmeier(lambda_nm: float, coeffs: Dict[str, List[float]]) -> float:
     return (max(n2, 1.0)) ** 0.5
 
 
-def refractive_index_at_wavelength(
-    lambda_nm: float,
+def n_from_sellmeier_array(lambda_nm, coeffs: Dict[str, List[float]]) -> np.ndarray:
+    """
+    n_from_sellmeier over an array of wavelengths (nm) in one vectorized pass.
+    Same terms in the same order; the root is taken with sqrt rather than pow,
+    so elements agree with the scalar result to within 1 ulp.
+    """
+    lam_um = np.asarray(lambda_nm, dtype=float) * 1e-3
+    lam2 = lam_um * lam_um
+    B = coeffs.get("B", [0, 0, 0])
+    C = coeffs.get("C", [1, 1, 1])
+    n2 = np.ones_like(lam2)
+    for i in range(min(3, len(B), len(C))):
+        n2 += (B[i] * lam2) / (lam2 - C[i])
+    return np.maximum(n2, 1.0) ** 0.5
+
+
+def material_dispersion(
     material_name: Optional[str],
     refractive_index_fallback: float,
-) -> float:
+) -> Tuple[Optional[Dict[str, List[float]]], float]:
     """
-    Get refractive index at wavelength λ (nm).
-    If material_name is in the library, use Sellmeier; otherwise use refractive_index_fallback.
+    Resolve how n(λ) is computed for a material, independent of wavelength.
+    Returns (sellmeier_coeffs, None) for a Sellmeier glass, else (None, constant_n).
     """
     if not material_name or not material_name.strip():
-        return refractive_index_fallback
+        return None, refractive_index_fallback
     if refractive_index_fallback <= 1.001:
-        return 1.0  # Air
+        return None, 1.0  # Air
     index = _build_name_index()
     mat = index.get(material_name.lower().strip())
     if mat is None:
-        return refractive_index_fallback
+        return None, refractive_index_fallback
     formula = mat.get("dispersion_formula", "constant")
     coeffs = mat.get("coefficients", {})
     if formula == "sellmeier" and coeffs:
-        return n_from_sellmeier(lambda_nm, coeffs)
+        return coeffs, None
     if formula == "constant":
-        return float(coeffs.get("n", refractive_index_fallback))
-    return refractive_index_fallback
+        return None, float(coeffs.get("n", refractive_index_fallback))
+    return None, refractive_index_fallback
+
+
+def refractive_index_at_wavelength(
+    lambda_nm: float,
+    material_name: Optional[str],
+    refractive_index_fallback: float,
+) -> float:
+    """
+    Get refractive index at wavelength λ (nm).
+    If material_name is in the library, use Sellmeier; otherwise use refractive_index_fallback.
+    """
+    coeffs, n_const = material_dispersion(material_name, refractive_index_fallback)
+    if coeffs is not None:
+        return n_from_sellmeier(lambda_nm, coeffs)
+    return n_const
 
 
 def get_all_materials() -> List[Dict[str, Any]]:
@@ -5,6 +5,9 @@ Accepts optical_stack JSON, runs rayoptics trace, returns (z,y) coords for rays
 
 import sys
 import os
+import threading
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
 
 # NumPy 2.0 fix for rayoptics
 import numpy as np
@@ -13,7 +16,8 @@ if not hasattr(np, "NaN"):
 
 from typing import Optional, List, Dict, Any
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
+import orjson
+from fastapi import FastAPI, File, UploadFile, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
@@ -23,7 +27,37 @@ if _root not in sys.path:
     sys.path.insert(0, _root)
 from trace_service import run_trace, run_chromatic_shift
 
-app = FastAPI(title="Optics Trace API", version="0.1.0")
+# Small singlet traced once at startup: pulls in the lazily imported modules (singlet
+# helpers, glass library, coatings, scipy) and JIT kernels before the first real request.
+_WARMUP_STACK = {
+    "surfaces": [
+        {"id": "w1", "type": "Glass", "radius": 100, "thickness": 5, "refractiveIndex": 1.5168,
+         "diameter": 25, "material": "N-BK7", "description": ""},
+        {"id": "w2", "type": "Air", "radius": -100, "thickness": 95, "refractiveIndex": 1.0,
+         "diameter": 25, "material": "Air", "description": ""},
+    ],
+    "entrancePupilDiameter": 10,
+    "wavelengths": [587.6],
+    "fieldAngles": [0],
+    "numRays": 3,
+}
+
+
+def _warm_trace():
+    try:
+        _trace_request(OpticalStackRequest(**_WARMUP_STACK))
+    except Exception:
+        pass  # best effort; the first request simply pays the cost instead
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    """Warm the trace path on a daemon thread so startup is not delayed."""
+    threading.Thread(target=_warm_trace, daemon=True).start()
+    yield
+
+
+app = FastAPI(title="Optics Trace API", version="0.1.0", lifespan=_lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -243,14 +277,62 @@ class OpticalStackRequest(BaseModel):
     iterations: Optional[int] = None  # Monte Carlo iterations (default 100)
 
 
+# Last /api/trace input and its result: tracing an unchanged stack again (double-clicks,
+# re-renders) returns the stored result instead of re-tracing. User coatings are part
+# of the key since they change reflectivity and which surfaces are mirrors.
+_last_trace: Dict[str, Any] = {"key": None, "result": None}
+# Traces currently running, by the same key: a duplicate request (agent + button)
+# waits on the first one's future instead of tracing again. Distinct keys run
+# concurrently; _trace_lock only guards these two structures, never a trace.
+_traces_in_flight: Dict[Any, Future] = {}
+_trace_lock = threading.Lock()
+
+
+def _trace_once(key, optical_stack: dict) -> dict:
+    """run_trace(optical_stack), reusing the last result or an in-flight trace for key."""
+    with _trace_lock:
+        if _last_trace["key"] == key:
+            return _last_trace["result"]
+        future = _traces_in_flight.get(key)
+        owner = future is None
+        if owner:
+            future = _traces_in_flight[key] = Future()
+    if not owner:
+        return future.result()
+    try:
+        result = run_trace(optical_stack)
+    except BaseException as exc:
+        with _trace_lock:
+            del _traces_in_flight[key]
+        future.set_exception(exc)
+        raise
+    with _trace_lock:
+        _last_trace["key"] = key
+        _last_trace["result"] = result
+        del _traces_in_flight[key]
+    future.set_result(result)
+    return result
+
+
+def _trace_request(req: OpticalStackRequest) -> dict:
+    """Trace req through _trace_once, keyed on the request and the user-coatings version."""
+    from coating_db import user_coatings_version
+    key = (req.model_dump_json(), user_coatings_version())
+    return _trace_once(key, req.model_dump())
+
+
 @app.post("/api/trace")
 def trace_rays(req: OpticalStackRequest):
     """
     Run ray trace on optical_stack.
     Returns rays as list of [[z,y], ...] polylines, surface curves, focusZ, performance.
     """
-    optical_stack = req.model_dump()
-    return run_trace(optical_stack)
+    result = _trace_request(req)
+    # Skip FastAPI's per-value jsonable_encoder walk over every ray point
+    return Response(
+        content=orjson.dumps(result, option=orjson.OPT_SERIALIZE_NUMPY),
+        media_type="application/json",
+    )
 
 
 class ChromaticShiftRequest(OpticalStackRequest):
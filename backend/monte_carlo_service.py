@@ -64,12 +64,12 @@ def _run_single_monte_carlo(optical_stack, surfaces_list, rng, num_rays, epd, wv
         opt_model.update_model()
         opt_model.optical_spec.update_optical_properties()
     try:
-        spot_xy, dxdy = run_spot_diagram(
-            opt_model, num_rays=num_rays, fld=0, wvl=wvl_nm, foc=0.0
+        # One model per trial: pickling each to the worker pool costs more than it saves
+        spot_xy, dxdy, valid = run_spot_diagram(
+            opt_model, num_rays=num_rays, fld=0, wvl=wvl_nm, foc=0.0, parallel=False
         )
     except Exception:
         return None, 0.0
-    valid = ~np.isnan(dxdy[:, 0])
     spots = [[float(spot_xy[idx, 0]), float(spot_xy[idx, 1])] for idx in range(len(spot_xy)) if valid[idx]]
     sm = opt_model.seq_model
     tfrms = sm.gbl_tfrms
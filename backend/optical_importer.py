@@ -6,13 +6,16 @@ DEVELOPER NOTE: Before making changes to import logic, read LENS_X_SPEC.md
 in the project root. It is the ground truth for the Lens-X schema.
 """
 
+import functools
+import itertools
 import json
 import logging
+import math
 import re
-import uuid
+import secrets
 from typing import Any, Dict, List, Optional, Tuple
 
-from glass_materials import get_material_by_name, refractive_index_at_wavelength
+from glass_materials import get_material_by_name, n_from_sellmeier, refractive_index_at_wavelength
 
 # Default wavelength for refractive index lookup
 _DEFAULT_WVL_NM = 587.6
@@ -20,12 +23,24 @@ _DEFAULT_APERTURE_RADIUS = 12.5  # mm; diameter = 2 * aperture_radius
 
 logger = logging.getLogger(__name__)
 
+# Surface ids only need to be unique within a session: one random token per
+# process plus a counter avoids an os.urandom call per imported surface.
+_RUN_ID = secrets.token_hex(4)
+_ID_SEQ = itertools.count()
+
+
+def _new_surface_id() -> str:
+    """Return a session-unique surface id."""
+    return f"{_RUN_ID}-{next(_ID_SEQ):06x}"
+
 
 def _parse_radius(v: Any) -> float:
     """
     Parse radius from JSON. Accepts numbers and string 'infinity'/'inf'/'flat'.
     Maps infinity to 0 (flat surface; curvature = 0 in ray-tracing).
     """
+    if type(v) is float:
+        return v  # common JSON case: no string checks or float() round-trip
     if v is None or v == "":
         return 0.0
     if isinstance(v, str):
@@ -38,6 +53,42 @@ def _parse_radius(v: Any) -> float:
         return 0.0
 
 
+@functools.lru_cache(maxsize=256)
+def _n_sellmeier3(
+    lambda_nm: float,
+    B: Tuple[float, float, float],
+    C: Tuple[float, float, float],
+) -> float:
+    """
+    Unrolled 3-term Sellmeier n(λ), λ in nm. Same arithmetic (and result) as
+    glass_materials.n_from_sellmeier, without the dict/loop overhead.
+    """
+    lam_um = lambda_nm * 1e-3
+    lam2 = lam_um * lam_um
+    n2 = (
+        1.0
+        + (B[0] * lam2) / (lam2 - C[0])
+        + (B[1] * lam2) / (lam2 - C[1])
+        + (B[2] * lam2) / (lam2 - C[2])
+    )
+    return (max(n2, 1.0)) ** 0.5
+
+
+def _sellmeier_index(B: Any, C: Any) -> float:
+    """
+    Refractive index at the default wavelength from Sellmeier B/C coefficients.
+    Numeric 3-term coefficients use the cached specialization; anything else
+    falls back to the generic n_from_sellmeier.
+    """
+    if (
+        isinstance(B, (list, tuple)) and isinstance(C, (list, tuple))
+        and len(B) == 3 and len(C) == 3
+        and all(isinstance(x, (int, float)) for x in (*B, *C))
+    ):
+        return _n_sellmeier3(_DEFAULT_WVL_NM, tuple(B), tuple(C))
+    return n_from_sellmeier(_DEFAULT_WVL_NM, {"B": B, "C": C})
+
+
 def _surface_from_dict(
     raw: Dict[str, Any],
     idx: int,
@@ -51,6 +102,8 @@ def _surface_from_dict(
     def get_float(d: Dict, *keys: str, default: float = 0.0) -> float:
         for k in keys:
             v = d.get(k)
+            if type(v) is float:
+                return v
             if v is not None and v != "":
                 try:
                     return float(v)
@@ -101,7 +154,7 @@ def _surface_from_dict(
         )
 
     result: Dict[str, Any] = {
-        "id": str(uuid.uuid4()),
+        "id": _new_surface_id(),
         "type": surf_type,
         "radius": radius,
         "thickness": thickness,
@@ -115,10 +168,9 @@ def _surface_from_dict(
     if isinstance(physics, dict):
         sellmeier = physics.get("sellmeier")
         if sellmeier and isinstance(sellmeier, dict):
-            from glass_materials import n_from_sellmeier
             B = sellmeier.get("B", [0, 0, 0])
             C = sellmeier.get("C", [1, 1, 1])
-            result["refractiveIndex"] = n_from_sellmeier(_DEFAULT_WVL_NM, {"B": B, "C": C})
+            result["refractiveIndex"] = _sellmeier_index(B, C)
             result["sellmeierCoefficients"] = sellmeier
         coating = physics.get("coating")
         if coating and isinstance(coating, str):
@@ -189,8 +241,6 @@ def _surface_from_lens_x(raw: Dict[str, Any], idx: int) -> Dict[str, Any]:
     Maps physics.sellmeier into sellmeierCoefficients for material engine.
     Ensures radius, thickness, aperture (diameter) for every surface.
     """
-    from glass_materials import n_from_sellmeier
-
     radius = _parse_radius(raw.get("radius"))
     thickness = float(raw.get("thickness") or 0)
     aperture = float(raw.get("aperture") or 12.5)
@@ -211,7 +261,7 @@ def _surface_from_lens_x(raw: Dict[str, Any], idx: int) -> Dict[str, Any]:
         if sellmeier and isinstance(sellmeier, dict):
             B = sellmeier.get("B", [0, 0, 0])
             C = sellmeier.get("C", [1, 1, 1])
-            n = n_from_sellmeier(_DEFAULT_WVL_NM, {"B": B, "C": C})
+            n = _sellmeier_index(B, C)
         else:
             n = float(physics.get("refractive_index") or raw.get("refractive_index") or 1.52)
             mat = get_material_by_name(material)
@@ -220,7 +270,7 @@ def _surface_from_lens_x(raw: Dict[str, Any], idx: int) -> Dict[str, Any]:
 
     mfg = raw.get("manufacturing") or {}
     result: Dict[str, Any] = {
-        "id": str(uuid.uuid4()),
+        "id": _new_surface_id(),
         "type": surf_type,
         "radius": radius,
         "thickness": thickness,
@@ -342,6 +392,16 @@ _MIN_PATH_LENGTH = 5.0  # Ignore paths shorter than this (arrows, text fragments
 _DEDUP_TOLERANCE = 0.1  # Paths within this distance are considered duplicates
 _MIN_STROKE_WIDTH = 0.5  # Paths with stroke-width below this are likely annotations
 
+# SVG attribute patterns, compiled once (the stroke-width ones run for every path)
+_SIZE_PERCENT_RE = re.compile(r'\b(width|height)\s*=\s*["\']([^"\']*?)%["\']', re.IGNORECASE)
+_VIEWBOX_PERCENT_RE = re.compile(r'\bviewBox\s*=\s*["\']0\s+0\s+\d*\.?\d*%\s+\d*\.?\d*%["\']', re.IGNORECASE)
+_ATTR_PERCENT_RE = re.compile(r'=\s*["\'](\d*\.?\d+)%["\']')
+_VIEWBOX_RE = re.compile(r'\bviewBox\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+_WIDTH_RE = re.compile(r'\bwidth\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+_HEIGHT_RE = re.compile(r'\bheight\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+_STYLE_STROKE_WIDTH_RE = re.compile(r'stroke-width\s*:\s*([^;]+)', re.IGNORECASE)
+_NON_NUMERIC_RE = re.compile(r'[^\d.]')
+
 
 def _sanitize_svg_for_parsing(svg_str: str) -> str:
     """
@@ -350,49 +410,32 @@ def _sanitize_svg_for_parsing(svg_str: str) -> str:
     - Replaces viewBox percentages with defaults
     - Strips '%' from all numeric attribute values (cx, cy, r, etc.) so float() won't fail
     """
-    # width="100%" or width='100%' -> width="800"; other width="N%" -> width="N"
-    def _replace_width(m: re.Match) -> str:
-        val = (m.group(1) or "").strip()
-        if val in ("100", "100.0", "100.00"):
-            return f'width="{_DEFAULT_SVG_WIDTH}"'
-        return f'width="{val}"' if val else f'width="{_DEFAULT_SVG_WIDTH}"'
-
-    svg_str = re.sub(
-        r'\bwidth\s*=\s*["\']([^"\']*?)%["\']',
-        lambda m: _replace_width(m),
-        svg_str,
-        flags=re.IGNORECASE,
-    )
-    # height: same logic
-    def _replace_height(m: re.Match) -> str:
-        val = (m.group(1) or "").strip()
+    # width="100%" -> width="800", height="100%" -> height="600";
+    # other width/height="N%" -> "N". One pass handles both attributes.
+    def _replace_size(m: re.Match) -> str:
+        attr = m.group(1).lower()
+        default = _DEFAULT_SVG_WIDTH if attr == "width" else _DEFAULT_SVG_HEIGHT
+        val = (m.group(2) or "").strip()
         if val in ("100", "100.0", "100.00"):
-            return f'height="{_DEFAULT_SVG_HEIGHT}"'
-        return f'height="{val}"' if val else f'height="{_DEFAULT_SVG_HEIGHT}"'
+            return f'{attr}="{default}"'
+        return f'{attr}="{val}"' if val else f'{attr}="{default}"'
 
-    svg_str = re.sub(
-        r'\bheight\s*=\s*["\']([^"\']*?)%["\']',
-        lambda m: _replace_height(m),
-        svg_str,
-        flags=re.IGNORECASE,
-    )
+    svg_str = _SIZE_PERCENT_RE.sub(_replace_size, svg_str)
     # viewBox="0 0 100% 100%" -> "0 0 800 600"
-    svg_str = re.sub(
-        r'\bviewBox\s*=\s*["\']0\s+0\s+\d*\.?\d*%\s+\d*\.?\d*%["\']',
+    svg_str = _VIEWBOX_PERCENT_RE.sub(
         f'viewBox="0 0 {_DEFAULT_SVG_WIDTH} {_DEFAULT_SVG_HEIGHT}"',
         svg_str,
-        flags=re.IGNORECASE,
     )
     # Strip % from remaining numeric attribute values: ="50%" -> ="50"
     # Handles cx, cy, r, rx, ry, x, y in path/circle/ellipse
-    svg_str = re.sub(r'=\s*["\'](\d*\.?\d+)%["\']', r'="\1"', svg_str)
+    svg_str = _ATTR_PERCENT_RE.sub(r'="\1"', svg_str)
     return svg_str
 
 
 def _get_viewport_from_svg(svg_str: str) -> Tuple[float, float]:
     """Extract viewport width and height from viewBox or width/height attributes."""
     # viewBox="0 0 W H" or viewBox="minX minY W H"
-    m = re.search(r'\bviewBox\s*=\s*["\']([^"\']+)["\']', svg_str, re.IGNORECASE)
+    m = _VIEWBOX_RE.search(svg_str)
     if m:
         parts = m.group(1).split()
         if len(parts) >= 4:
@@ -403,18 +446,18 @@ def _get_viewport_from_svg(svg_str: str) -> Tuple[float, float]:
             except (ValueError, IndexError):
                 pass
     # width/height attributes
-    wm = re.search(r'\bwidth\s*=\s*["\']([^"\']+)["\']', svg_str, re.IGNORECASE)
-    hm = re.search(r'\bheight\s*=\s*["\']([^"\']+)["\']', svg_str, re.IGNORECASE)
+    wm = _WIDTH_RE.search(svg_str)
+    hm = _HEIGHT_RE.search(svg_str)
     w = _DEFAULT_SVG_WIDTH
     h = _DEFAULT_SVG_HEIGHT
     if wm:
         try:
-            w = float(re.sub(r'[^\d.]', '', wm.group(1)) or w)
+            w = float(_NON_NUMERIC_RE.sub('', wm.group(1)) or w)
         except ValueError:
             pass
     if hm:
         try:
-            h = float(re.sub(r'[^\d.]', '', hm.group(1)) or h)
+            h = float(_NON_NUMERIC_RE.sub('', hm.group(1)) or h)
         except ValueError:
             pass
     return w, h
@@ -429,20 +472,42 @@ def _path_has_curvature(path) -> bool:
     return False
 
 
+def _cheap_length_upper_bound(path) -> float:
+    """
+    Upper bound on path.length() without numeric arc-length integration:
+    exact for Line, control-polygon length for Bezier, r_max * |sweep| for Arc.
+    Returns inf for segments it cannot bound.
+    """
+    total = 0.0
+    for seg in path:
+        try:
+            if type(seg).__name__ == 'Arc':
+                r_max = max(abs(seg.radius.real), abs(seg.radius.imag))
+                total += max(r_max * math.radians(abs(seg.delta)), abs(seg.end - seg.start))
+            else:
+                bpts = seg.bpoints()
+                total += sum(abs(b - a) for a, b in zip(bpts, bpts[1:]))
+        except Exception:
+            return math.inf
+    return total
+
+
 def _path_is_straight_horizontal(path) -> bool:
     """True if path is only Line segments and all points share the same y."""
     if _path_has_curvature(path):
         return False
-    ys: List[float] = []
+    # Compare each point with the first y, stopping at the first that deviates
+    y0 = None
     for seg in path:
-        if hasattr(seg, 'start'):
-            ys.append(seg.start.imag)
-        if hasattr(seg, 'end'):
-            ys.append(seg.end.imag)
-    if not ys:
-        return False
-    y0 = ys[0]
-    return all(abs(y - y0) < 1e-6 for y in ys)
+        for attr in ('start', 'end'):
+            if not hasattr(seg, attr):
+                continue
+            y = getattr(seg, attr).imag
+            if y0 is None:
+                y0 = y
+            elif abs(y - y0) >= 1e-6:
+                return False
+    return y0 is not None
 
 
 def _path_intersects_centerline(path, centerline_y: float) -> bool:
@@ -486,16 +551,16 @@ def _path_should_ignore_style(attrs: Dict[str, Any]) -> bool:
         v = attrs.get(key)
         if v is not None:
             try:
-                w = float(re.sub(r'[^\d.]', '', str(v)) or 0)
+                w = float(_NON_NUMERIC_RE.sub('', str(v)) or 0)
                 if 0 < w < _MIN_STROKE_WIDTH:
                     return True
             except ValueError:
                 pass
     # stroke-width in style
-    sw = re.search(r'stroke-width\s*:\s*([^;]+)', style, re.IGNORECASE)
+    sw = _STYLE_STROKE_WIDTH_RE.search(style)
     if sw:
         try:
-            w = float(re.sub(r'[^\d.]', '', sw.group(1)) or 0)
+            w = float(_NON_NUMERIC_RE.sub('', sw.group(1)) or 0)
             if 0 < w < _MIN_STROKE_WIDTH:
                 return True
         except ValueError:
@@ -544,18 +609,21 @@ def import_from_svg(content: bytes) -> List[Dict[str, Any]]:
             "svgpathtools is required for SVG import. Install with: pip install svgpathtools"
         ) from e
 
+    # Rebind svg_str at each stage so the raw and sanitized text are not both
+    # kept alive, and drop it once parsed (the caller still owns the bytes).
     svg_str = content.decode("utf-8", errors="replace")
     svg_str = _sanitize_svg_for_parsing(svg_str)
+    # Get viewport for centerline (optical axis) before the text is released
+    vp_w, vp_h = _get_viewport_from_svg(svg_str)
     try:
         paths, path_attrs = svgstr2paths(svg_str)
     except Exception as e:
         raise ValueError(f"Failed to parse SVG paths: {e}") from e
+    del svg_str
 
     if not paths:
         raise ValueError("No paths found in SVG.")
 
-    # Get viewport for centerline (optical axis)
-    vp_w, vp_h = _get_viewport_from_svg(svg_str)
     centerline_y = vp_h / 2.0
 
     # Ensure path_attrs aligns with paths (svgstr2paths may convert circles/etc to paths)
@@ -572,6 +640,8 @@ def import_from_svg(content: bytes) -> List[Dict[str, Any]]:
         # LENS-X tagged SVG: only use paths with data-type="optical-surface"
         length_ok_paths = []
         for i, path, attrs in optical_tagged:
+            if _cheap_length_upper_bound(path) < _MIN_PATH_LENGTH:
+                continue
             try:
                 plen = path.length()
             except Exception:
@@ -586,6 +656,9 @@ def import_from_svg(content: bytes) -> List[Dict[str, Any]]:
         ymin_curv, ymax_curv = float('inf'), float('-inf')
         for i, path in enumerate(paths):
             attrs = attrs_list[i] if i < len(attrs_list) else {}
+            # Annotation fragments are short; skip them before integrating arc length
+            if _cheap_length_upper_bound(path) < _MIN_PATH_LENGTH:
+                continue
             try:
                 plen = path.length()
             except Exception:
@@ -639,6 +712,12 @@ def import_from_svg(content: bytes) -> List[Dict[str, Any]]:
     # Sort by center_x (optical axis position, left to right)
     indexed.sort(key=lambda x: x[1][1])
 
+    # SVG surfaces alternate N-BK7 / Air, so the index lookup is loop-invariant
+    medium_for_type = {
+        "Glass": ("N-BK7", refractive_index_at_wavelength(_DEFAULT_WVL_NM, "N-BK7", 1.52)),
+        "Air": ("Air", 1.0),
+    }
+    last_idx = len(indexed) - 1
     surfaces: List[Dict[str, Any]] = []
     for i, (_, (radius, center_x, diameter)) in enumerate(indexed):
         # Radius: positive = convex toward object (left), negative = concave
@@ -646,21 +725,16 @@ def import_from_svg(content: bytes) -> List[Dict[str, Any]]:
         r_mm = radius if radius is not None else 0.0  # 0 = flat (infinite radius)
         # Thickness: distance to next surface
         thickness = 0.0
-        if i + 1 < len(indexed):
+        if i < last_idx:
             next_cx = indexed[i + 1][1][1]
             thickness = abs(next_cx - center_x)
 
         # Alternate Glass / Air for typical lens layout
-        surf_type = "Glass" if (i % 2 == 0 and i < len(indexed) - 1) else "Air"
-        material = "N-BK7" if surf_type == "Glass" else "Air"
-        n = (
-            refractive_index_at_wavelength(_DEFAULT_WVL_NM, material, 1.52)
-            if surf_type == "Glass"
-            else 1.0
-        )
+        surf_type = "Glass" if (i % 2 == 0 and i < last_idx) else "Air"
+        material, n = medium_for_type[surf_type]
 
         surfaces.append({
-            "id": str(uuid.uuid4()),
+            "id": _new_surface_id(),
             "type": surf_type,
             "radius": r_mm,
             "thickness": thickness,
@@ -0,0 +1,30 @@
+"""
+Process-wide fixes that must run before the first rayoptics.optical import.
+Shared by trace_service and singlet_rayoptics so that fresh worker processes
+(which import singlet_rayoptics directly) get the same environment.
+"""
+
+import os
+import sys
+import types
+
+import numpy as np
+
+
+def setup_rayoptics():
+    """Apply the NumPy 2.0 np.NaN alias and the headless rayoptics.gui.appcmds stub. Idempotent."""
+    # NumPy 2.0 fix for rayoptics (np.NaN removed)
+    if not hasattr(np, "NaN"):
+        np.NaN = np.nan
+
+    # Stub rayoptics.gui.appcmds before any opticalmodel import
+    if "rayoptics.gui.appcmds" not in sys.modules:
+        ro = __import__("rayoptics", fromlist=[])
+        gui_dir = os.path.join(os.path.dirname(ro.__file__), "gui")
+        if sys.modules.get("rayoptics.gui") is None:
+            gui_mod = types.ModuleType("rayoptics.gui")
+            gui_mod.__path__ = [gui_dir]
+            sys.modules["rayoptics.gui"] = gui_mod
+        stub = types.ModuleType("rayoptics.gui.appcmds")
+        stub.open_model = lambda *a, **k: (_ for _ in ()).throw(NotImplementedError("headless"))
+        sys.modules["rayoptics.gui.appcmds"] = stub
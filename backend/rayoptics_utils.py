@@ -2,6 +2,7 @@
 Optical utility functions for ray tracing.
 """
 
+import math
 from typing import Optional
 
 import numpy as np
@@ -19,8 +20,21 @@ def snell_law(n1: float, n2: float, theta1_rad: float) -> Optional[float]:
     Returns:
         Angle of refraction in radians, or None if total internal reflection occurs.
     """
-    sin_theta1 = np.sin(theta1_rad)
-    sin_theta2 = n1 * sin_theta1 / n2
-    if sin_theta2 > 1.0 or sin_theta2 < -1.0:
+    sin_theta2 = n1 * math.sin(theta1_rad) / n2
+    # |sin(theta2)| > 1 as a single compare on the square
+    if sin_theta2 * sin_theta2 > 1.0:
         return None  # Total internal reflection
-    return np.arcsin(sin_theta2)
+    return math.asin(sin_theta2)
+
+
+def snell_law_array(n1, n2, theta1_rad) -> np.ndarray:
+    """
+    Vectorized snell_law over array-like (broadcastable) n1, n2 and theta1_rad.
+
+    Returns:
+        Array of refraction angles in radians; NaN where total internal reflection occurs.
+    """
+    sin_theta2 = np.asarray(n1, dtype=float) * np.sin(theta1_rad) / np.asarray(n2, dtype=float)
+    tir = sin_theta2 * sin_theta2 > 1.0
+    theta2 = np.arcsin(np.where(tir, 0.0, sin_theta2))
+    return np.where(tir, np.nan, theta2)
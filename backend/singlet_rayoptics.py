@@ -4,15 +4,38 @@ Singlet lens analysis with rayoptics: surface data -> sequential ray trace,
 focal length, and spot diagram.
 """
 
+import functools
+import itertools
+import os
+import pickle
+import sys
+import threading
+import weakref
+
 import numpy as np
+
+# Backend directory on path for rayoptics_setup; pool workers import this module directly
+_backend_dir = os.path.dirname(os.path.abspath(__file__))
+if _backend_dir not in sys.path:
+    sys.path.insert(0, _backend_dir)
+
+from rayoptics_setup import setup_rayoptics
+
+setup_rayoptics()
+
 from rayoptics.optical.opticalmodel import OpticalModel
 from rayoptics.raytr import trace
-from rayoptics.raytr import sampler
 from rayoptics.raytr import analyses
 
+# Object gap used for "object at infinity". rayoptics treats a gap this large as
+# an infinite conjugate and launches rays from the field angle; smaller values
+# risk being handled as a finite object distance, and an inf gap propagates
+# inf/NaN through gbl_tfrms.
+INFINITE_OBJECT_DISTANCE = 1e10
+
 
 def build_singlet_from_surface_data(surf_data_list, wvl_nm=587.6, radius_mode=False,
-                                    epd=None, object_distance=1e10,
+                                    epd=None, object_distance=INFINITE_OBJECT_DISTANCE,
                                     surface_diameters=None):
     """
     Build an OpticalModel for a singlet from a list of surface data.
@@ -22,7 +45,7 @@ def build_singlet_from_surface_data(surf_data_list, wvl_nm=587.6, radius_mode=Fa
     wvl_nm: design wavelength (nm).
     radius_mode: if True, surf_data_list uses radius instead of curvature.
     epd: entrance pupil diameter (mm). If None, taken from paraxial model later.
-    object_distance: thickness of object gap (mm). Use large value for infinity.
+    object_distance: thickness of object gap (mm). Use INFINITE_OBJECT_DISTANCE for infinity.
     surface_diameters: optional list of diameter (mm) per surface; sets aperture.
 
     Returns:
@@ -39,11 +62,12 @@ def build_singlet_from_surface_data(surf_data_list, wvl_nm=587.6, radius_mode=Fa
         sm.add_surface(surf_data, wvl=wvl_nm)
 
     # Set surface diameters (semi-diameter = diameter/2) if provided
+    # (zip bounds the loop to the existing interfaces, no per-item index check)
     if surface_diameters:
-        for i, d in enumerate(surface_diameters):
-            if d is not None and d > 0 and i + 1 < len(sm.ifcs):
-                sm.ifcs[i + 1].set_max_aperture(d / 2.0)
-        if epd is None and surface_diameters and surface_diameters[0] and surface_diameters[0] > 0:
+        for ifc, d in zip(sm.ifcs[1:], surface_diameters):
+            if d is not None and d > 0:
+                ifc.set_max_aperture(d / 2.0)
+        if epd is None and surface_diameters[0] and surface_diameters[0] > 0:
             epd = surface_diameters[0]
 
     # Stop at first real surface (index 1)
@@ -52,7 +76,7 @@ def build_singlet_from_surface_data(surf_data_list, wvl_nm=587.6, radius_mode=Fa
 
     # Set wavelength for optical spec
     osp = opt_model.optical_spec
-    if not hasattr(osp.spectral_region, 'wavelengths') or not osp.spectral_region.wavelengths:
+    if not getattr(osp.spectral_region, 'wavelengths', None):
         osp.spectral_region.set_from_list([('d', 1.0)])
     osp.spectral_region.central_wvl = wvl_nm
     if epd is not None:
@@ -67,6 +91,19 @@ def build_singlet_from_surface_data(surf_data_list, wvl_nm=587.6, radius_mode=Fa
     return opt_model
 
 
+def set_entrance_pupil(opt_model, epd):
+    """
+    Change the entrance pupil diameter (mm) of a built model in place.
+    Surfaces are untouched, so only the paraxial data is refreshed and the
+    update_model() pass of a full rebuild is skipped; use this for EPD or
+    F/# sweeps. Returns opt_model.
+    """
+    opt_model.optical_spec.pupil.value = epd
+    opt_model.optical_spec.update_optical_properties()
+    _ref_pt_cache.pop(opt_model, None)
+    return opt_model
+
+
 def get_focal_length(opt_model):
     """Return effective focal length (mm) and first-order summary."""
     parax = opt_model['analysis_results']['parax_data']
@@ -76,11 +113,57 @@ def get_focal_length(opt_model):
     return fod.efl, fod
 
 
-def get_ray_trace_table(opt_model, num_rays=11, fld=0, wvl=None, foc=0.0):
+# Per-model reference-sphere points, keyed by (fld, wvl, foc)
+_ref_pt_cache = weakref.WeakKeyDictionary()
+
+
+def _ref_point(opt_model, fld, fld_obj, wvl, foc):
+    """
+    Chief-ray reference point from trace.setup_pupil_coords, cached per model.
+    Entries remember the model's gbl_tfrms list, which update_model replaces,
+    so a rebuilt model recomputes instead of reusing a stale point.
+    """
+    tfrms = opt_model.seq_model.gbl_tfrms
+    try:
+        per_model = _ref_pt_cache.setdefault(opt_model, {})
+    except TypeError:
+        per_model = {}
+    key = (fld, wvl, foc)
+    entry = per_model.get(key)
+    if entry is None or entry[0] is not tfrms:
+        ref_sphere, _ = trace.setup_pupil_coords(opt_model, fld_obj, wvl, foc)
+        entry = per_model[key] = (tfrms, ref_sphere[0])
+    return entry[1]
+
+
+@functools.lru_cache(maxsize=16)
+def pupil_grid(num_rays):
+    """
+    (num_rays**2, 2) normalized pupil grid over -1..1, as one contiguous array.
+    Same values and order as rayoptics sampler.grid_ray_generator (x outer, y inner).
+    Cached per num_rays and shared between calls, so the array is read-only.
     """
-    Return ray-trace data as a list of dicts for DataFrame display.
+    g = -1.0 + np.arange(num_rays) * (np.float64(2.0) / (num_rays - 1))
+    px, py = np.meshgrid(g, g, indexing="ij")
+    grid = np.stack([px.ravel(), py.ravel()], axis=1)
+    grid.flags.writeable = False
+    return grid
+
+
+def get_ray_trace_table(opt_model, num_rays=11, fld=0, wvl=None, foc=0.0, round_values=True,
+                        as_columns=False):
+    """
+    Ray-trace data for DataFrame display, one entry per ray that reaches surface 1.
     Columns: Ray, Pupil X, Pupil Y, Y at S1 (mm), Slope (1/mm), Angle (deg),
              Spot X (mm), Spot Y (mm), Trans DX (mm), Trans DY (mm).
+    round_values: round to display precision (4 or 6 places per column); False
+        returns full-precision values and leaves formatting to the view.
+
+    Returns:
+        as_columns=False: list of {column: value} dicts, one per ray.
+        as_columns=True: {column: 1-D ndarray} with one element per ray, which
+            DataFrame() takes without the row-to-column transpose.
+        An empty list (or dict) when no ray reaches surface 1.
     """
     from rayoptics.optical import model_constants as mc
     osp = opt_model.optical_spec
@@ -88,82 +171,226 @@ def get_ray_trace_table(opt_model, num_rays=11, fld=0, wvl=None, foc=0.0):
     wvl = wvl or osp.spectral_region.central_wvl
     tfrms = opt_model.seq_model.gbl_tfrms
 
-    grid_def = [np.array([-1., -1.]), np.array([1., 1.]), num_rays]
-    pupil_coords = list(sampler.grid_ray_generator(grid_def))
+    pupil_coords = pupil_grid(num_rays)
     ray_list = analyses.trace_ray_list(
         opt_model, pupil_coords, fld_obj, wvl, foc, check_apertures=True
     )
     ray_list_data = analyses.focus_pupil_coords(
         opt_model, ray_list, fld_obj, wvl, foc
     )
-    ref_sphere, _ = trace.setup_pupil_coords(opt_model, fld_obj, wvl, foc)
-    ref_pt = ref_sphere[0]
-    dxdy = np.array([r[:2] for r in ray_list_data])
+    ref_pt = _ref_point(opt_model, fld, fld_obj, wvl, foc)
+    dxdy = np.asarray(ray_list_data, dtype=float)[:, :2]
     spot_xy = ref_pt[:2] + dxdy
 
-    rows = []
-    for idx, (_, _, ray_result) in enumerate(ray_list):
-        if ray_result is None:
-            continue
-        px, py = pupil_coords[idx]
-        ray = ray_result[mc.ray]
-        if len(ray) < 2 or idx >= len(spot_xy):
-            continue
-        # First real surface intercept (segment 1)
-        seg = ray[1]
-        p = seg[mc.p]
-        d = seg[mc.d]
-        rot, trns = tfrms[1]
-        p_glob = rot.dot(p) + trns
-        y_s1 = p_glob[1]
-        dz, dy = rot.dot(d)[2], rot.dot(d)[1]
-        slope = (dy / dz) if abs(dz) > 1e-12 else np.nan
-        angle_deg = np.degrees(np.arctan(slope)) if np.isfinite(slope) else np.nan
-
-        rows.append({
-            "Ray": idx + 1,
-            "Pupil X": round(px, 4),
-            "Pupil Y": round(py, 4),
-            "Y at S1 (mm)": round(y_s1, 4),
-            "Slope (1/mm)": round(slope, 6) if np.isfinite(slope) else np.nan,
-            "Angle (deg)": round(angle_deg, 4) if np.isfinite(angle_deg) else np.nan,
-            "Spot X (mm)": round(spot_xy[idx, 0], 6),
-            "Spot Y (mm)": round(spot_xy[idx, 1], 6),
-            "Trans DX (mm)": round(dxdy[idx, 0], 6),
-            "Trans DY (mm)": round(dxdy[idx, 1], 6),
-        })
-    return rows
-
-
-def run_spot_diagram(opt_model, num_rays=21, fld=0, wvl=None, foc=0.0):
+    # Gather segment 1 (first real surface) of every usable ray, then transform
+    # and derive slope/angle for all rays at once
+    keep = [
+        idx for idx, (_, _, ray_result) in enumerate(ray_list)
+        if ray_result is not None and len(ray_result[mc.ray]) >= 2 and idx < len(spot_xy)
+    ]
+    if not keep:
+        return {} if as_columns else []
+    idx = np.array(keep)
+    segs = [ray_list[i][2][mc.ray][1] for i in keep]
+    P = np.array([seg[mc.p] for seg in segs], dtype=float)
+    D = np.array([seg[mc.d] for seg in segs], dtype=float)
+    rot, trns = tfrms[1]
+    y_s1 = (P @ rot.T + trns)[:, 1]
+    D_glob = D @ rot.T
+    dz, dy = D_glob[:, 2], D_glob[:, 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(np.abs(dz) > 1e-12, dy / dz, np.nan)
+    angle_deg = np.degrees(np.arctan(slope))
+    pupil = pupil_coords[idx]
+
+    def rnd(values, places):
+        return np.round(values, places) if round_values else values
+
+    columns = {
+        "Ray": idx + 1,
+        "Pupil X": rnd(pupil[:, 0], 4),
+        "Pupil Y": rnd(pupil[:, 1], 4),
+        "Y at S1 (mm)": rnd(y_s1, 4),
+        "Slope (1/mm)": rnd(slope, 6),
+        "Angle (deg)": rnd(angle_deg, 4),
+        "Spot X (mm)": rnd(spot_xy[idx, 0], 6),
+        "Spot Y (mm)": rnd(spot_xy[idx, 1], 6),
+        "Trans DX (mm)": rnd(dxdy[idx, 0], 6),
+        "Trans DY (mm)": rnd(dxdy[idx, 1], 6),
+    }
+    if as_columns:
+        return columns
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*(col.tolist() for col in columns.values()))]
+
+
+# Spot grids with at least this many rays are traced across a process pool
+PARALLEL_MIN_RAYS = 400
+_pool = None
+_pool_lock = threading.Lock()
+# Tags each call's pickled model so workers unpickle it once, not once per chunk
+_payload_tokens = itertools.count()
+# Worker side: (token, (opt_model, fld_obj)) last unpickled by this process
+_worker_payload = (None, None)
+
+
+def _trace_chunk(opt_model, pupil_chunk, fld_obj, wvl, foc):
+    """Trace one slice of the pupil grid."""
+    return analyses.trace_ray_list(
+        opt_model, pupil_chunk, fld_obj, wvl, foc, check_apertures=True
+    )
+
+
+def _trace_chunk_pickled(token, payload, pupil_chunk, wvl, foc):
+    """Pool worker: _trace_chunk on a pickled (opt_model, fld_obj), loaded once per token."""
+    global _worker_payload
+    if _worker_payload[0] != token:
+        _worker_payload = (token, pickle.loads(payload))
+    opt_model, fld_obj = _worker_payload[1]
+    return _trace_chunk(opt_model, pupil_chunk, fld_obj, wvl, foc)
+
+
+def _submit_chunks(n_jobs, token, payload, chunks, wvl, foc):
+    """
+    Submit one task per chunk to the shared pool, creating it on first use.
+    Fetch and submit happen under _pool_lock, so another thread dropping a
+    broken pool cannot shut it down in between. Workers are started with
+    forkserver (spawn where unavailable): forking the threaded server could
+    copy a lock held by another thread into the child and deadlock it.
+    Returns (pool, futures), with futures None if the pool is already broken.
+    """
+    global _pool
+    # Imported here: pulls in multiprocessing, only needed for a parallel trace
+    from concurrent.futures.process import BrokenProcessPool
+    with _pool_lock:
+        if _pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                ctx = multiprocessing.get_context("forkserver")
+                ctx.set_forkserver_preload([__name__])
+            else:
+                ctx = multiprocessing.get_context("spawn")
+            _pool = ProcessPoolExecutor(max_workers=n_jobs, mp_context=ctx)
+        pool = _pool
+        try:
+            return pool, [
+                pool.submit(_trace_chunk_pickled, token, payload, chunk, wvl, foc)
+                for chunk in chunks
+            ]
+        except BrokenProcessPool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+    return pool, None
+
+
+def _drop_pool(pool):
+    """Forget a broken pool so the next parallel trace starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _trace_ray_list(opt_model, pupil_coords, fld_obj, wvl, foc, parallel=True):
+    """
+    trace_ray_list, split across worker processes for a single large grid.
+    Rays are independent, so chunks are traced in parallel and concatenated in
+    pupil order; the model and field are pickled once per call. Runs sequentially
+    when parallel is False (callers tracing many models in a loop, where
+    pickling each model would cost more than it saves), for small grids,
+    single-core hosts, a model that cannot be pickled, or a broken pool.
+    Trace errors propagate.
+    """
+    n_jobs = os.cpu_count() or 1
+    if parallel and len(pupil_coords) >= PARALLEL_MIN_RAYS and n_jobs > 1:
+        try:
+            payload = pickle.dumps((opt_model, fld_obj), pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            payload = None  # model holds something unpicklable
+        if payload is not None:
+            from concurrent.futures.process import BrokenProcessPool
+            chunks = np.array_split(pupil_coords, n_jobs)
+            pool, futures = _submit_chunks(n_jobs, next(_payload_tokens), payload, chunks, wvl, foc)
+            if futures is not None:
+                try:
+                    return [ray for future in futures for ray in future.result()]
+                except BrokenProcessPool:
+                    _drop_pool(pool)
+    return _trace_chunk(opt_model, pupil_coords, fld_obj, wvl, foc)
+
+
+def run_spot_diagram(opt_model, num_rays=21, fld=0, wvl=None, foc=0.0, ray_list=None,
+                     parallel=True):
     """
     Run sequential ray trace for a grid in the pupil; return spot (x,y) and dx,dy.
+    ray_list: optional trace_ray_list output for this same grid, field, wavelength
+    and focus (e.g. from run_trace), to skip tracing it again.
+    parallel: allow a large grid to be split across the worker pool; pass False
+    when tracing many models in a loop (see _trace_ray_list).
 
     Returns:
         spot_xy: (N, 2) array of spot positions (x, y) in image plane (mm).
         spot_dxdy: (N, 2) transverse aberration (dx, dy) vs chief ray.
+        valid: (N,) bool mask of rays that reached the image (dx not NaN).
     """
     osp = opt_model.optical_spec
     fld_obj = osp.field_of_view.fields[fld]
     wvl = wvl or osp.spectral_region.central_wvl
 
-    # Grid of rays in pupil (normalized -1..1)
-    grid_def = [np.array([-1., -1.]), np.array([1., 1.]), num_rays]
-    pupil_coords = list(sampler.grid_ray_generator(grid_def))
-
-    # Trace and refocus to get spot positions and transverse aberration
-    ray_list = analyses.trace_ray_list(
-        opt_model, pupil_coords, fld_obj, wvl, foc, check_apertures=True
-    )
+    # Trace a grid of rays in pupil (normalized -1..1), then refocus to get spot
+    # positions and transverse aberration
+    if ray_list is None:
+        ray_list = _trace_ray_list(opt_model, pupil_grid(num_rays), fld_obj, wvl, foc, parallel=parallel)
     ray_list_data = analyses.focus_pupil_coords(
         opt_model, ray_list, fld_obj, wvl, foc
     )
     # ray_list_data: (N, 3) with last dim = (dx, dy, opd); we want (x,y) = ref + (dx,dy)
-    ref_sphere, _ = trace.setup_pupil_coords(opt_model, fld_obj, wvl, foc)
-    ref_pt = ref_sphere[0]
-    dxdy = np.array([r[:2] for r in ray_list_data])
+    ref_pt = _ref_point(opt_model, fld, fld_obj, wvl, foc)
+    dxdy = np.asarray(ray_list_data, dtype=float)[:, :2]
     spot_xy = ref_pt[:2] + dxdy
-    return spot_xy, dxdy
+    return spot_xy, dxdy, ~np.isnan(dxdy[:, 0])
+
+
+def spot_summary(spot_xy, dxdy, valid):
+    """
+    One pass over the valid rays of a spot diagram.
+    Returns (x_min, x_max, y_min, y_max, rms_dx, rms_dy), or None if no ray is valid.
+    """
+    xy = spot_xy[valid]
+    d = dxdy[valid]
+    n = len(d)
+    if n == 0:
+        return None
+    dx, dy = d[:, 0], d[:, 1]
+    return (xy[:, 0].min(), xy[:, 0].max(), xy[:, 1].min(), xy[:, 1].max(),
+            np.sqrt(dx.dot(dx) / n), np.sqrt(dy.dot(dy) / n))
+
+
+@functools.lru_cache(maxsize=32)
+def _build_cached(surf_key, wvl_nm, diam_key):
+    """
+    Memoized build for calculate_and_format_results, keyed on hashable inputs.
+    Returns (opt_model, cache); cache holds results derived from that model
+    (spot diagrams by run_spot_diagram args, and the formatted "result" text).
+    Both are shared between calls: never mutate the model.
+    """
+    opt_model = build_singlet_from_surface_data(
+        [list(row) for row in surf_key], wvl_nm=wvl_nm, radius_mode=False, object_distance=INFINITE_OBJECT_DISTANCE,
+        surface_diameters=list(diam_key) if diam_key is not None else None
+    )
+    return opt_model, {}
+
+
+_DIV_ZERO_MSG = (
+    "Division by zero: the optical configuration may be invalid.\n\n"
+    "Common causes:\n"
+    "• Afocal system (parallel in, parallel out)\n"
+    "• Zero or infinite focal length\n"
+    "• Use n=1 for air gaps between lenses (not n=2)\n\n"
+    "Check material values: air should be 1, glass typically 1.5–1.7."
+)
 
 
 def calculate_and_format_results(surf_data_list, wvl_nm=587.6, return_opt_model=False,
@@ -174,60 +401,58 @@ def calculate_and_format_results(surf_data_list, wvl_nm=587.6, return_opt_model=
     return_opt_model: if True, return (result_string, opt_model); else result_string.
     surface_diameters: optional list of diameter (mm) per surface.
     Returns multi-line string suitable for display in GUI.
+    Models are cached per input, so a returned opt_model is shared: copy it
+    before mutating.
     """
     lines = []
     try:
-        lines.append("Wavelength: {:.1f} nm".format(wvl_nm))
+        lines.append(f"Wavelength: {wvl_nm:.1f} nm")
         lines.append("")
-        opt_model = build_singlet_from_surface_data(
-            surf_data_list, wvl_nm=wvl_nm, radius_mode=False, object_distance=1e10,
-            surface_diameters=surface_diameters
+        opt_model, cache = _build_cached(
+            tuple(map(tuple, surf_data_list)),
+            wvl_nm,
+            tuple(surface_diameters) if surface_diameters is not None else None,
         )
+        result = cache.get("result")
+        if result is not None:
+            return (result, opt_model) if return_opt_model else result
         efl, fod = get_focal_length(opt_model)
         if efl is not None:
             sm = opt_model.seq_model
             last_surf_z = sm.gbl_tfrms[-2][1][2] if len(sm.gbl_tfrms) >= 2 else 0
             focal_point_z = last_surf_z + fod.bfl
-            lines.append("Focal length (EFL): {:.4f} mm".format(efl))
-            lines.append("Back focal length (BFL): {:.4f} mm".format(fod.bfl))
-            lines.append("Front focal length (FFL): {:.4f} mm".format(fod.ffl))
-            lines.append("F-number: {:.4f}".format(fod.fno))
-            lines.append("Focal point (z): {:.4f} mm  (from 1st surface; matches BFL)".format(focal_point_z))
-        spot_xy, dxdy = run_spot_diagram(opt_model, num_rays=11, fld=0, wvl=wvl_nm)
-        valid = ~np.isnan(dxdy[:, 0])
-        if np.any(valid):
+            lines.append(f"Focal length (EFL): {efl:.4f} mm")
+            lines.append(f"Back focal length (BFL): {fod.bfl:.4f} mm")
+            lines.append(f"Front focal length (FFL): {fod.ffl:.4f} mm")
+            lines.append(f"F-number: {fod.fno:.4f}")
+            lines.append(f"Focal point (z): {focal_point_z:.4f} mm  (from 1st surface; matches BFL)")
+        spot_key = (11, 0, wvl_nm)
+        if spot_key not in cache:
+            cache[spot_key] = run_spot_diagram(opt_model, num_rays=11, fld=0, wvl=wvl_nm)
+        summary = spot_summary(*cache[spot_key])
+        if summary is not None:
+            x_min, x_max, y_min, y_max, rms_dx, rms_dy = summary
             lines.append("")
             lines.append("Spot diagram:")
-            lines.append("  Spot X (mm): min={:.6f} max={:.6f}".format(
-                np.nanmin(spot_xy[valid, 0]), np.nanmax(spot_xy[valid, 0])))
-            lines.append("  Spot Y (mm): min={:.6f} max={:.6f}".format(
-                np.nanmin(spot_xy[valid, 1]), np.nanmax(spot_xy[valid, 1])))
-            lines.append("  Transverse aberration DX (mm) RMS: {:.6f}".format(
-                np.sqrt(np.nanmean(dxdy[valid, 0]**2))))
-            lines.append("  Transverse aberration DY (mm) RMS: {:.6f}".format(
-                np.sqrt(np.nanmean(dxdy[valid, 1]**2))))
+            lines.append(f"  Spot X (mm): min={x_min:.6f} max={x_max:.6f}")
+            lines.append(f"  Spot Y (mm): min={y_min:.6f} max={y_max:.6f}")
+            lines.append(f"  Transverse aberration DX (mm) RMS: {rms_dx:.6f}")
+            lines.append(f"  Transverse aberration DY (mm) RMS: {rms_dy:.6f}")
         result = "\n".join(lines)
         if not result.strip():
             result = "No results: focal length or spot data unavailable.\nCheck surface data (radius, thickness, material) and try 1–2 real surfaces."
+        cache["result"] = result
         if return_opt_model:
             return result, opt_model
         return result
-    except ZeroDivisionError as e:
-        msg = (
-            "Division by zero: the optical configuration may be invalid.\n\n"
-            "Common causes:\n"
-            "• Afocal system (parallel in, parallel out)\n"
-            "• Zero or infinite focal length\n"
-            "• Use n=1 for air gaps between lenses (not n=2)\n\n"
-            "Check material values: air should be 1, glass typically 1.5–1.7."
-        )
+    except ZeroDivisionError:
         if return_opt_model:
-            return msg, None
-        return msg
+            return _DIV_ZERO_MSG, None
+        return _DIV_ZERO_MSG
     except Exception as e:
         if return_opt_model:
-            return "Error: " + str(e), None
-        return "Error: " + str(e)
+            return f"Error: {e}", None
+        return f"Error: {e}"
 
 
 def main():
@@ -242,29 +467,25 @@ def main():
 
     wvl = 587.6  # nm
     opt_model = build_singlet_from_surface_data(
-        singlet_surf_data, wvl_nm=wvl, radius_mode=False, object_distance=1e10
+        singlet_surf_data, wvl_nm=wvl, radius_mode=False, object_distance=INFINITE_OBJECT_DISTANCE
     )
 
     # Focal length
     efl, fod = get_focal_length(opt_model)
     if efl is not None:
-        print("Focal length (efl): {:.4f} mm".format(efl))
-        print("BFL: {:.4f} mm".format(fod.bfl))
-        print("FFL: {:.4f} mm".format(fod.ffl))
+        print(f"Focal length (efl): {efl:.4f} mm")
+        print(f"BFL: {fod.bfl:.4f} mm")
+        print(f"FFL: {fod.ffl:.4f} mm")
 
     # Spot diagram (sequential ray trace)
-    spot_xy, dxdy = run_spot_diagram(opt_model, num_rays=11, fld=0, wvl=wvl)
-    valid = ~np.isnan(dxdy[:, 0])
-    if np.any(valid):
+    summary = spot_summary(*run_spot_diagram(opt_model, num_rays=11, fld=0, wvl=wvl))
+    if summary is not None:
+        x_min, x_max, y_min, y_max, rms_dx, rms_dy = summary
         print("\nSpot diagram (sample):")
-        print("  Spot X (mm): min={:.6f} max={:.6f}".format(
-            np.nanmin(spot_xy[valid, 0]), np.nanmax(spot_xy[valid, 0])))
-        print("  Spot Y (mm): min={:.6f} max={:.6f}".format(
-            np.nanmin(spot_xy[valid, 1]), np.nanmax(spot_xy[valid, 1])))
-        print("  Transverse aberration DX (mm): RMS={:.6f}".format(
-            np.sqrt(np.nanmean(dxdy[valid, 0]**2))))
-        print("  Transverse aberration DY (mm): RMS={:.6f}".format(
-            np.sqrt(np.nanmean(dxdy[valid, 1]**2))))
+        print(f"  Spot X (mm): min={x_min:.6f} max={x_max:.6f}")
+        print(f"  Spot Y (mm): min={y_min:.6f} max={y_max:.6f}")
+        print(f"  Transverse aberration DX (mm): RMS={rms_dx:.6f}")
+        print(f"  Transverse aberration DY (mm): RMS={rms_dy:.6f}")
 
 
 if __name__ == "__main__":
@@ -1,9 +1,13 @@
 """Unit tests for ray intersection calculations."""
 
+import math
+
+import numpy as np
 import pytest
 
 # Skip if trace_service cannot be imported (rayoptics dependency)
 try:
+    from backend import trace_service
     from backend.trace_service import run_trace, get_metrics_at_z
     TRACE_AVAILABLE = True
 except ImportError:
@@ -70,6 +74,24 @@ class TestThreeSurfaceRayIntersections:
         assert isinstance(result["rays"], list)
         assert isinstance(result["surfaces"], list)
 
+    def test_repeat_trace_reuses_cached_model(self, three_surface_optical_stack):
+        """Tracing the same stack twice (cached model) gives the same result."""
+        first = run_trace(three_surface_optical_stack)
+        second = run_trace(three_surface_optical_stack)
+        assert second["rays"] == first["rays"]
+        assert second["bestFocusZ"] == first["bestFocusZ"]
+
+    def test_concurrent_traces_share_cached_model(self, three_surface_optical_stack):
+        """Concurrent traces of one lens (one cached model) match a serial trace."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        serial = run_trace(three_surface_optical_stack)
+        with ThreadPoolExecutor(max_workers=4) as ex:
+            results = list(ex.map(run_trace, [three_surface_optical_stack] * 8))
+        for result in results:
+            assert result["rays"] == serial["rays"]
+            assert result["bestFocusZ"] == serial["bestFocusZ"]
+
     def test_ray_count_matches_request(self, three_surface_optical_stack):
         """Number of rays should be consistent with numRays (grid produces multiple rays)."""
         result = run_trace(three_surface_optical_stack)
@@ -192,6 +214,16 @@ class TestGetMetricsAtZ:
         expected_deg = math.degrees(math.atan(0.2))
         assert abs(m["chiefRayAngle"] - expected_deg) < 0.01
 
+    def test_explicit_chief_idx(self):
+        """A passed chief_idx selects that ray for chiefRayAngle."""
+        rays = [
+            [[0, -5], [10, -5]],   # slope = 0
+            [[0, 0], [10, 2]],     # default chief ray, slope = 0.2
+        ]
+        assert get_metrics_at_z(5, rays, chief_idx=1) == get_metrics_at_z(5, rays)
+        m = get_metrics_at_z(5, rays, chief_idx=0)
+        assert m["chiefRayAngle"] == 0.0
+
     def test_empty_rays_returns_none(self):
         """Empty ray data returns None metrics."""
         m = get_metrics_at_z(10, [])
@@ -199,3 +231,121 @@ class TestGetMetricsAtZ:
         assert m["beamWidth"] is None
         assert m["chiefRayAngle"] is None
         assert m["numRays"] == 0
+
+
+@pytest.fixture
+def ragged_rays():
+    """Rays of different lengths: a fold (non-monotonic z), a 1-point and an empty ray."""
+    return [
+        [[0, -1.0], [10, -0.5], [25, 0.25], [40, 1.0]],
+        [[0, 0.0], [10, 0.1], [40, 0.3]],
+        [[0, 2.0], [30, 1.0], [15, 0.5]],
+        [[0, 1.5], [10, 1.5], [10, 1.0], [40, -0.5]],
+        [[5, 3.0]],
+        [],
+    ]
+
+
+class TestMetricsSweepKernels:
+    """
+    The numba kernels and the NumPy sweep must match get_metrics_at_z. Without
+    numba installed _njit is a no-op, so the kernels run here as plain Python.
+    """
+
+    Z_POSITIONS = [-5.0, 0.0, 5.0, 10.0, 12.5, 20.0, 30.0, 40.0, 55.0]
+
+    @pytest.mark.parametrize("sweep", ["_metrics_sweep_kernel", "_batched_metrics_sweep"])
+    def test_sweep_matches_get_metrics_at_z(self, ragged_rays, sweep):
+        Z, Y, lengths = trace_service._pack_rays(ragged_rays)
+        chief_idx = trace_service._chief_ray_index(ragged_rays)
+        z_positions = np.array(self.Z_POSITIONS)
+        rms, beam_width, chief_slope, y_centroid, num_rays = getattr(trace_service, sweep)(
+            z_positions, Z, Y, lengths, chief_idx
+        )
+        for i, z in enumerate(self.Z_POSITIONS):
+            m = get_metrics_at_z(z, ragged_rays, chief_idx=chief_idx)
+            assert num_rays[i] == m["numRays"]
+            assert rms[i] == pytest.approx(m["rmsRadius"], abs=1e-12)
+            assert beam_width[i] == pytest.approx(m["beamWidth"], abs=1e-12)
+            assert y_centroid[i] == pytest.approx(m["yCentroid"], abs=1e-12)
+            assert math.degrees(math.atan(chief_slope[i])) == pytest.approx(m["chiefRayAngle"], abs=1e-9)
+
+    @pytest.mark.parametrize("z_pos", Z_POSITIONS)
+    def test_interp_packed_matches_interpolate_ray_at_z(self, ragged_rays, z_pos):
+        Z, Y, lengths = trace_service._pack_rays(ragged_rays)
+        for r, ray in enumerate(ragged_rays):
+            y, slope, ok = trace_service._interp_packed(z_pos, Z[r], Y[r], lengths[r])
+            y_ref, slope_ref = trace_service._interpolate_ray_at_z(np.asarray(ray, dtype=float), z_pos)
+            assert ok == (y_ref is not None)
+            if ok:
+                assert y == pytest.approx(y_ref, abs=1e-12)
+                assert slope == pytest.approx(slope_ref, abs=1e-12)
+
+    @pytest.mark.parametrize("have_numba", [True, False])
+    def test_metrics_sweep_either_path(self, ragged_rays, monkeypatch, have_numba):
+        """_metrics_sweep gives get_metrics_at_z's dicts on both the kernel and NumPy paths."""
+        monkeypatch.setattr(trace_service, "_HAVE_NUMBA", have_numba)
+        points = trace_service._metrics_sweep(self.Z_POSITIONS, ragged_rays)
+        for z, point in zip(self.Z_POSITIONS, points):
+            assert point == pytest.approx(get_metrics_at_z(z, ragged_rays), abs=1e-9)
+
+
+def _segment(pt, direction):
+    """One traced-ray segment in rayoptics layout (point at mc.p, direction at mc.d)."""
+    mc = trace_service.mc
+    seg = [None] * (max(mc.p, mc.d) + 1)
+    seg[mc.p] = np.array(pt, dtype=float)
+    seg[mc.d] = np.array(direction, dtype=float)
+    return seg
+
+
+def _fold(deg):
+    """Rotation about x by deg degrees (a tilted surface folding the y-z plane)."""
+    c, s = math.cos(math.radians(deg)), math.sin(math.radians(deg))
+    return np.array([[1.0, 0.0, 0.0], [0.0, c, -s], [0.0, s, c]])
+
+
+_IDENTITY = np.eye(3)
+
+
+@pytest.fixture(params=["infinite_object", "finite_object", "folded"])
+def polyline_case(request):
+    """(ray, tfrms) pairs covering the back-extension, no extension and a tilted surface."""
+    d = np.array([0.0, 0.05, 1.0]) / math.hypot(0.05, 1.0)
+    if request.param == "infinite_object":
+        tfrms = [(_IDENTITY, np.array([0.0, 0.0, -1e10])), (_IDENTITY, np.zeros(3)),
+                 (_IDENTITY, np.array([0.0, 0.0, 5.0])), (_IDENTITY, np.array([0.0, 0.0, 60.0]))]
+        ray = [_segment([0, 2.0, 0], [0, 0, 1]), _segment([0, 2.0, 0.02], d),
+               _segment([0, 1.8, 0.0], [0, -0.03, 1.0]), _segment([0, 0.1, 0.0], [0, -0.03, 1.0])]
+    elif request.param == "finite_object":
+        tfrms = [(_IDENTITY, np.array([0.0, 0.0, -20.0])), (_IDENTITY, np.zeros(3)),
+                 (_IDENTITY, np.array([0.0, 0.0, 40.0]))]
+        ray = [_segment([0, 0.0, 0], d), _segment([0, 1.0, 0.01], [0, -0.02, 1.0]),
+               _segment([0, 0.2, 0.0], [0, -0.02, 1.0])]
+    else:
+        tfrms = [(_IDENTITY, np.array([0.0, 0.0, -1e10])), (_IDENTITY, np.zeros(3)),
+                 (_fold(30.0), np.array([0.0, 0.0, 20.0])), (_fold(60.0), np.array([0.0, 5.0, 30.0]))]
+        ray = [_segment([0, 1.0, 0], [0, 0, 1]), _segment([0, 1.0, 0.0], [0, 0, 1]),
+               _segment([0, 0.5, 0.1], [0, 0.4, 0.9]), _segment([0, -0.3, 0.0], [0, 0.1, 1.0])]
+    return ray, tfrms
+
+
+class TestRayToPolyline:
+    """_ray_to_polyline gives the same points on the numba-kernel and NumPy paths."""
+
+    @pytest.mark.parametrize("extend_parallel_back", [50.0, 0.0])
+    @pytest.mark.parametrize("focus_z", [None, 100.0, 10.0])
+    def test_kernel_matches_numpy(self, polyline_case, monkeypatch, extend_parallel_back, focus_z):
+        ray, tfrms = polyline_case
+        kwargs = dict(extend_parallel_back=extend_parallel_back, focus_z=focus_z, z_origin=1.5)
+        monkeypatch.setattr(trace_service, "_HAVE_NUMBA", False)
+        expected = trace_service._ray_to_polyline(ray, tfrms, **kwargs)
+        monkeypatch.setattr(trace_service, "_HAVE_NUMBA", True)
+        actual = trace_service._ray_to_polyline(ray, tfrms, **kwargs)
+        assert actual.shape == expected.shape
+        np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-12)
+
+    def test_empty_ray(self, monkeypatch):
+        for have_numba in (True, False):
+            monkeypatch.setattr(trace_service, "_HAVE_NUMBA", have_numba)
+            assert trace_service._ray_to_polyline([], [(_IDENTITY, np.zeros(3))]).shape == (0, 2)
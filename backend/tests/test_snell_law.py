@@ -1,8 +1,9 @@
 """Unit tests for Snell's law refraction angle calculation."""
 
 import math
+import numpy as np
 import pytest
-from backend.rayoptics_utils import snell_law
+from backend.rayoptics_utils import snell_law, snell_law_array
 
 
 class TestSnellLaw:
@@ -71,3 +72,31 @@ class TestSnellLaw:
         # Expected: sin(theta2) = sin(30°)/1.5168 ≈ 0.3297 -> theta2 ≈ 19.25°
         expected = math.asin(math.sin(theta1) / 1.5168)
         assert abs(theta2 - expected) < 1e-10
+
+
+class TestSnellLawArray:
+    """Tests for the vectorized snell_law_array."""
+
+    def test_matches_scalar(self):
+        """Each element should equal the scalar snell_law result."""
+        theta1 = np.radians([-60, -30, 0, 15, 30, 41, 60])
+        theta2 = snell_law_array(1.5, 1.0, theta1)
+        for t1, t2 in zip(theta1, theta2):
+            expected = snell_law(1.5, 1.0, float(t1))
+            if expected is None:
+                assert np.isnan(t2)
+            else:
+                assert abs(t2 - expected) < 1e-12
+
+    def test_total_internal_reflection_is_nan(self):
+        """Angles beyond the critical angle give NaN, others stay finite."""
+        theta2 = snell_law_array(1.5, 1.0, np.radians([20, 50]))
+        assert np.isfinite(theta2[0])
+        assert np.isnan(theta2[1])
+
+    def test_broadcasts_indices(self):
+        """Per-ray indices broadcast against per-ray angles."""
+        theta1 = math.radians(30)
+        theta2 = snell_law_array(np.array([1.0, 1.0]), np.array([1.5, 1.5168]), theta1)
+        assert theta2.shape == (2,)
+        assert abs(theta2[1] - math.asin(math.sin(theta1) / 1.5168)) < 1e-12
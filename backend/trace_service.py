@@ -3,35 +3,34 @@ Optical trace service: converts frontend optical_stack to rayoptics format,
 runs ray trace, returns (z,y) coordinates for rays and lens surface curves.
 """
 
+import functools
 import sys
 import os
-import types
+import threading
 
-# NumPy 2.0 fix for rayoptics (np.NaN removed)
 import numpy as np
-if not hasattr(np, "NaN"):
-    np.NaN = np.nan
 
 # Ensure backend directory is on path for singlet_rayoptics import
 _backend_dir = os.path.dirname(os.path.abspath(__file__))
 if _backend_dir not in sys.path:
     sys.path.insert(0, _backend_dir)
 
-# Stub rayoptics.gui.appcmds before any opticalmodel import
-if "rayoptics.gui.appcmds" not in sys.modules:
-    _ro = __import__("rayoptics", fromlist=[])
-    _gui_dir = os.path.join(os.path.dirname(_ro.__file__), "gui")
-    if sys.modules.get("rayoptics.gui") is None:
-        _gui_mod = types.ModuleType("rayoptics.gui")
-        _gui_mod.__path__ = [_gui_dir]
-        sys.modules["rayoptics.gui"] = _gui_mod
-    _stub = types.ModuleType("rayoptics.gui.appcmds")
-    _stub.open_model = lambda *a, **k: (_ for _ in ()).throw(NotImplementedError("headless"))
-    sys.modules["rayoptics.gui.appcmds"] = _stub
+# NumPy 2.0 np.NaN alias and the headless appcmds stub, before any opticalmodel import
+from rayoptics_setup import setup_rayoptics
+
+setup_rayoptics()
 
-import numpy as np
 from rayoptics.optical import model_constants as mc
-from rayoptics.raytr import sampler, analyses
+
+# Numba is optional: when installed, the metrics sweep runs as a compiled kernel
+try:
+    from numba import njit as _njit
+    _HAVE_NUMBA = True
+except ImportError:
+    _HAVE_NUMBA = False
+
+    def _njit(*args, **kwargs):
+        return lambda fn: fn
 
 
 def _profile_points(ifc, sd, n_pts=31):
@@ -46,74 +45,181 @@ def _profile_points(ifc, sd, n_pts=31):
     if cv == 0:
         return np.array([[0, -sd], [0, sd]])
     R = 1.0 / cv
-    y_vals = np.linspace(-sd, sd, n_pts)
-    radicand = np.maximum(R * R - y_vals * y_vals, 0)
-    z_vals = R - np.sign(R) * np.sqrt(radicand)
-    return np.column_stack([z_vals, y_vals])
-
-
-def _transform_profile(points, rot, trns):
-    """Transform profile points to global coords. points: (N, 2) as (z, y)."""
-    pts_3d = np.zeros((len(points), 3))
-    pts_3d[:, 0] = 0
-    pts_3d[:, 1] = points[:, 1]
-    pts_3d[:, 2] = points[:, 0]
-    transformed = (rot.dot(pts_3d.T)).T + trns
-    return np.column_stack([transformed[:, 2], transformed[:, 1]])
+    # Sag written in place into the z column: z = R - sign(R) * sqrt(max(R² - y², 0))
+    out = np.empty((n_pts, 2))
+    y_vals, z_vals = out[:, 1], out[:, 0]
+    y_vals[:] = np.linspace(-sd, sd, n_pts)
+    np.multiply(y_vals, y_vals, out=z_vals)
+    np.subtract(R * R, z_vals, out=z_vals)
+    np.maximum(z_vals, 0, out=z_vals)
+    np.sqrt(z_vals, out=z_vals)
+    z_vals *= -np.sign(R)
+    z_vals += R
+    return out
+
+
+def _transform_profiles(point_sets, tfrm_list, z_offset=0.0):
+    """
+    Transform several profiles to global coords in one vectorized pass.
+    point_sets: list of (N_k, 2) arrays as (z, y); tfrm_list: matching (rot, trns).
+    Returns a list of (N_k, 2) global (z, y) arrays, with z_offset subtracted from z.
+    """
+    counts = [len(points) for points in point_sets]
+    local = np.concatenate(point_sets)
+    z_in, y_in = local[:, 0], local[:, 1]
+    owner = np.repeat(np.arange(len(point_sets)), counts)
+    # Profiles lie in the local x = 0 plane, so only the (y, z) rows/columns of each rotation matter
+    rots = np.array([rot for rot, _ in tfrm_list], dtype=float)[owner]
+    trns = np.array([trns for _, trns in tfrm_list], dtype=float)[owner]
+    zy = np.empty((len(local), 2))
+    zy[:, 0] = rots[:, 2, 1] * y_in + rots[:, 2, 2] * z_in + trns[:, 2] - z_offset
+    zy[:, 1] = rots[:, 1, 1] * y_in + rots[:, 1, 2] * z_in + trns[:, 1]
+    return np.split(zy, np.cumsum(counts)[:-1])
+
+
+def _stack_tfrms(tfrms):
+    """Stack (rot, trns) surface transforms once into contiguous (K,3,3) and (K,3) arrays."""
+    rots = np.empty((len(tfrms), 3, 3))
+    trns = np.empty((len(tfrms), 3))
+    for i, (rot, t) in enumerate(tfrms):
+        rots[i], trns[i] = rot, t
+    return rots, trns
+
+
+def _stack_ray(ray, tfrms, stacked_tfrms=None):
+    """
+    Gather a traced ray and its surface transforms into contiguous arrays.
+    Returns (rots (S,3,3), trns (S,3), P (S,3), D (S,3)) for S = min(len(ray), len(tfrms)).
+    stacked_tfrms: optional _stack_tfrms(tfrms); its leading rows are used as-is.
+    """
+    n_seg = min(len(ray), len(tfrms))
+    if stacked_tfrms is None:
+        stacked_tfrms = _stack_tfrms(tfrms[:n_seg])
+    rots, trns = stacked_tfrms[0][:n_seg], stacked_tfrms[1][:n_seg]
+    P = np.empty((n_seg, 3))
+    D = np.empty((n_seg, 3))
+    for i in range(n_seg):
+        P[i] = ray[i][mc.p]
+        D[i] = ray[i][mc.d]
+    return rots, trns, P, D
+
+
+@_njit(cache=True)
+def _polyline_kernel(rots, trns, P, D, rot_last, d_last, extend_parallel_back,
+                     extend_to_focus, focus_z, z_origin):
+    """
+    Compiled body of _ray_to_polyline over _stack_ray arrays. focus_z is NaN when
+    there is no focus to extend to. Returns an (N, 2) array of (z, y).
+    """
+    n_seg = P.shape[0]
+    out = np.empty((n_seg + 2, 2))
+    n = 0  # points stored from out[1]; out[0] is kept for the back-extension
+    has_back = False
+    for i in range(n_seg):
+        r = rots[i]
+        p = P[i]
+        gz = r[2, 0] * p[0] + r[2, 1] * p[1] + r[2, 2] * p[2] + trns[i, 2]
+        gy = r[1, 0] * p[0] + r[1, 1] * p[1] + r[1, 2] * p[2] + trns[i, 1]
+        if abs(gz) > 1e6:
+            continue
+        out[1 + n, 0] = gz - z_origin
+        out[1 + n, 1] = gy
+        n += 1
+        if i == 1 and extend_parallel_back > 0 and n == 1:
+            r0 = rots[0]
+            d = D[0]
+            dz = r0[2, 0] * d[0] + r0[2, 1] * d[1] + r0[2, 2] * d[2]
+            dy = r0[1, 0] * d[0] + r0[1, 1] * d[1] + r0[1, 2] * d[2]
+            if abs(dz) > 1e-6:
+                out[0, 0] = (gz - z_origin) - extend_parallel_back * (dz / abs(dz))
+                out[0, 1] = gy - extend_parallel_back * (dy / abs(dz))
+                has_back = True
+    first = 0 if has_back else 1
+    last = 1 + n
+    if extend_to_focus and last - first >= 2 and not np.isnan(focus_z):
+        z_last = out[last - 1, 0]
+        y_last = out[last - 1, 1]
+        if z_last < focus_z - 0.1:
+            dz = rot_last[2, 0] * d_last[0] + rot_last[2, 1] * d_last[1] + rot_last[2, 2] * d_last[2]
+            dy = rot_last[1, 0] * d_last[0] + rot_last[1, 1] * d_last[1] + rot_last[1, 2] * d_last[2]
+            if abs(dz) > 1e-6:
+                out[last, 0] = focus_z
+                out[last, 1] = y_last + (focus_z - z_last) * (dy / dz)
+                last += 1
+    return out[first:last]
 
 
 def _ray_to_polyline(ray, tfrms, extend_parallel_back=50.0, extend_to_focus=True,
-                     focus_z=None, z_origin=0):
-    """Convert ray segments to (z, y) polyline. Returns list of [z, y]."""
-    pts = []
-    for i, seg in enumerate(ray):
-        if i >= len(tfrms):
-            break
-        rot, trns = tfrms[i]
-        p = seg[mc.p]
-        d = seg[mc.d]
-        p_glob = rot.dot(p) + trns
-        d_glob = rot.dot(d)
-        z_disp = p_glob[2] - z_origin
-        if abs(p_glob[2]) > 1e6:
-            continue
-        pts.append([float(z_disp), float(p_glob[1])])
-        if i == 1 and extend_parallel_back > 0 and len(pts) == 1:
-            d_in = ray[0][mc.d] if len(ray) > 0 else d
-            rot0, _ = tfrms[0]
-            d_glob = rot0.dot(d_in)
+                     focus_z=None, z_origin=0, stacked_tfrms=None):
+    """
+    Convert ray segments to a (z, y) polyline. Returns an (N, 2) float array; callers
+    convert to lists only at the JSON boundary.
+    stacked_tfrms: optional _stack_tfrms(tfrms), shared by all rays of one trace.
+    """
+    if len(ray) == 0 or len(tfrms) == 0:
+        return np.empty((0, 2))
+    if stacked_tfrms is None:
+        stacked_tfrms = _stack_tfrms(tfrms)
+    rots, trns, P, D = _stack_ray(ray, tfrms, stacked_tfrms)
+    i_last = min(len(ray) - 1, len(tfrms) - 1)
+    if _HAVE_NUMBA:
+        rot_last = stacked_tfrms[0][i_last]
+        pts = _polyline_kernel(
+            rots, trns, P, D, rot_last, np.asarray(ray[-1][mc.d], dtype=float),
+            float(extend_parallel_back), bool(extend_to_focus),
+            float(focus_z) if focus_z is not None else np.nan, float(z_origin),
+        )
+        return pts
+
+    # All segment points to global coords at once; drop the far-away object point(s)
+    # (batched matmul: for a handful of segments it beats einsum's subscript parsing)
+    p_glob = (rots @ P[:, :, None])[:, :, 0] + trns
+    keep = ~(np.abs(p_glob[:, 2]) > 1e6)
+    # One buffer with a spare row at each end for the extensions; pts[start:stop] is in use
+    n_keep = int(np.count_nonzero(keep))
+    pts = np.empty((n_keep + 2, 2))
+    start, stop = 1, n_keep + 1
+    pts[start:stop, 0] = p_glob[keep, 2] - z_origin
+    pts[start:stop, 1] = p_glob[keep, 1]
+    # Extend back along the incoming direction when the first kept point is surface 1
+    if extend_parallel_back > 0 and len(keep) > 1 and keep[1] and not keep[0]:
+        d_glob = rots[0].dot(D[0])
+        dz, dy = d_glob[2], d_glob[1]
+        if abs(dz) > 1e-6:
+            z0, y0 = pts[start]
+            z_back = z0 - extend_parallel_back * (dz / abs(dz))
+            y_back = y0 - extend_parallel_back * (dy / abs(dz))
+            start = 0
+            pts[start] = z_back, y_back
+
+    if extend_to_focus and stop - start >= 2 and focus_z is not None:
+        z_last, y_last = pts[stop - 1, 0], pts[stop - 1, 1]
+        if z_last < focus_z - 0.1:
+            d_glob = stacked_tfrms[0][i_last].dot(ray[-1][mc.d])
             dz, dy = d_glob[2], d_glob[1]
             if abs(dz) > 1e-6:
-                z0, y0 = z_disp, p_glob[1]
-                z_back = z0 - extend_parallel_back * (dz / abs(dz))
-                y_back = y0 - extend_parallel_back * (dy / abs(dz))
-                pts.insert(0, [float(z_back), float(y_back)])
-    pts = np.array(pts) if pts else np.zeros((0, 2))
-
-    if extend_to_focus and len(pts) >= 2 and focus_z is not None:
-        z_last, y_last = pts[-1, 0], pts[-1, 1]
-        if z_last < focus_z - 0.1:
-            d = ray[-1][mc.d] if len(ray) > 0 else None
-            if d is not None:
-                rot, trns = tfrms[min(len(ray) - 1, len(tfrms) - 1)]
-                d_glob = rot.dot(d)
-                dz, dy = d_glob[2], d_glob[1]
-                if abs(dz) > 1e-6:
-                    dist = focus_z - z_last
-                    z_foc = focus_z
-                    y_foc = y_last + dist * (dy / dz)
-                    pts = np.vstack([pts, [[z_foc, y_foc]]])
-    return [[float(p[0]), float(p[1])] for p in pts]
+                dist = focus_z - z_last
+                z_foc = focus_z
+                y_foc = y_last + dist * (dy / dz)
+                pts[stop] = z_foc, y_foc
+                stop += 1
+    return pts[start:stop]
+
+
+def _rays_as_arrays(rays):
+    """Convert rays ([[z, y], ...] lists or arrays) to float ndarrays once, for repeated interpolation."""
+    return [np.asarray(ray, dtype=float) for ray in rays]
 
 
 def _interpolate_ray_at_z(ray, z_pos):
     """
     Interpolate (y, slope) of a ray at a specific Z position.
-    Ray format: list of [z, y] points. Returns (y, slope) or (None, None) if ray is empty.
+    Ray format: list of [z, y] points or an (N, 2) array (used as-is, no copy).
+    Returns (y, slope) or (None, None) if ray is empty.
     """
-    if not ray or len(ray) < 2:
+    if ray is None or len(ray) < 2:
         return None, None
-    pts = np.array(ray)
+    pts = np.asarray(ray, dtype=float)
     z_vals = pts[:, 0]
     y_vals = pts[:, 1]
     z_min, z_max = float(z_vals.min()), float(z_vals.max())
@@ -129,16 +235,18 @@ def _interpolate_ray_at_z(ray, z_pos):
         slope = dy / dz if abs(dz) > 1e-12 else 0.0
         y = y_vals[-1] + slope * (z_pos - z_vals[-1])
         return float(y), float(slope)
-    for i in range(len(pts) - 1):
-        z0, z1 = z_vals[i], z_vals[i + 1]
-        if z0 <= z_pos <= z1:
-            dz = z1 - z0
-            dy = y_vals[i + 1] - y_vals[i]
-            slope = dy / dz if abs(dz) > 1e-12 else 0.0
-            t = (z_pos - z0) / dz if abs(dz) > 1e-12 else 0.0
-            y = y_vals[i] + t * dy
-            return float(y), float(slope)
-    return None, None
+    # First segment bracketing z_pos (z need not be monotonic, e.g. after an HR mirror)
+    hits = np.flatnonzero((z_vals[:-1] <= z_pos) & (z_pos <= z_vals[1:]))
+    if hits.size == 0:
+        return None, None
+    i = hits[0]
+    z0 = z_vals[i]
+    dz = z_vals[i + 1] - z0
+    dy = y_vals[i + 1] - y_vals[i]
+    slope = dy / dz if abs(dz) > 1e-12 else 0.0
+    t = (z_pos - z0) / dz if abs(dz) > 1e-12 else 0.0
+    y = y_vals[i] + t * dy
+    return float(y), float(slope)
 
 
 def _rms_radius(y_vals):
@@ -154,18 +262,262 @@ def _rms_radius(y_vals):
     return float(np.sqrt(max(0.0, mean_y2 - mean_y ** 2)))
 
 
-def get_metrics_at_z(z_pos, ray_data):
+def _pack_rays(ray_data):
+    """
+    Pack ragged [[z, y], ...] polylines into NaN-padded (R, L) z and y arrays.
+    Returns (Z, Y, lengths) where lengths[i] is the point count of ray i.
+    """
+    n_rays = len(ray_data)
+    lengths = np.fromiter((len(ray) for ray in ray_data), dtype=np.int64, count=n_rays)
+    width = int(lengths.max()) if n_rays else 0
+    Z = np.full((n_rays, width), np.nan)
+    Y = np.full((n_rays, width), np.nan)
+    for i, ray in enumerate(ray_data):
+        if lengths[i]:
+            pts = np.asarray(ray, dtype=float)
+            Z[i, :lengths[i]] = pts[:, 0]
+            Y[i, :lengths[i]] = pts[:, 1]
+    return Z, Y, lengths
+
+
+def _chief_ray_index(ray_data):
+    """Chief ray: the one starting at (0,0) in pupil = smallest |y| at first point. -1 if no rays."""
+    if not ray_data:
+        return -1
+    return min(range(len(ray_data)), key=lambda i: abs(ray_data[i][0][1]) if len(ray_data[i]) else float("inf"))
+
+
+def _chief_ray_index_packed(Y, lengths):
+    """_chief_ray_index over _pack_rays output, as one argmin."""
+    if len(lengths) == 0:
+        return -1
+    return int(np.argmin(np.where(lengths > 0, np.abs(Y[:, 0]) if Y.shape[1] else np.inf, np.inf)))
+
+
+@_njit(cache=True)
+def _interp_packed(z_pos, z_row, y_row, n_pts):
+    """
+    Compiled twin of _interpolate_ray_at_z for one packed ray.
+    Returns (y, slope, ok); ok is False where the Python version returns None.
+    """
+    if n_pts < 2:
+        return 0.0, 0.0, False
+    z_min = z_row[0]
+    z_max = z_row[0]
+    for k in range(1, n_pts):
+        if z_row[k] < z_min:
+            z_min = z_row[k]
+        if z_row[k] > z_max:
+            z_max = z_row[k]
+    if z_pos <= z_min:
+        dz = z_row[1] - z_row[0]
+        slope = (y_row[1] - y_row[0]) / dz if abs(dz) > 1e-12 else 0.0
+        return y_row[0] + slope * (z_pos - z_row[0]), slope, True
+    if z_pos >= z_max:
+        dz = z_row[n_pts - 1] - z_row[n_pts - 2]
+        slope = (y_row[n_pts - 1] - y_row[n_pts - 2]) / dz if abs(dz) > 1e-12 else 0.0
+        return y_row[n_pts - 1] + slope * (z_pos - z_row[n_pts - 1]), slope, True
+    for k in range(n_pts - 1):
+        z0 = z_row[k]
+        z1 = z_row[k + 1]
+        if z0 <= z_pos and z_pos <= z1:
+            dz = z1 - z0
+            dy = y_row[k + 1] - y_row[k]
+            if abs(dz) > 1e-12:
+                return y_row[k] + (z_pos - z0) / dz * dy, dy / dz, True
+            return y_row[k], 0.0, True
+    return 0.0, 0.0, False
+
+
+@_njit(cache=True)
+def _metrics_sweep_kernel(z_positions, Z, Y, lengths, chief_idx):
+    """
+    Metrics at every z in z_positions over packed rays (see _pack_rays).
+    Returns arrays (rms, beam_width, chief_slope, y_centroid, num_rays);
+    float entries are NaN where the metric is undefined.
+    """
+    n_z = z_positions.shape[0]
+    rms = np.full(n_z, np.nan)
+    beam_width = np.full(n_z, np.nan)
+    chief_slope = np.full(n_z, np.nan)
+    y_centroid = np.full(n_z, np.nan)
+    num_rays = np.zeros(n_z, dtype=np.int64)
+    for p in range(n_z):
+        z = z_positions[p]
+        n = 0
+        s1 = 0.0
+        s2 = 0.0
+        y_lo = np.inf
+        y_hi = -np.inf
+        for r in range(Z.shape[0]):
+            y, slope, ok = _interp_packed(z, Z[r], Y[r], lengths[r])
+            if ok:
+                n += 1
+                s1 += y
+                s2 += y * y
+                if y < y_lo:
+                    y_lo = y
+                if y > y_hi:
+                    y_hi = y
+        num_rays[p] = n
+        if n == 0:
+            continue
+        mean = s1 / n
+        y_centroid[p] = mean
+        rms[p] = np.sqrt(max(0.0, s2 / n - mean * mean))
+        beam_width[p] = y_hi - y_lo
+        if chief_idx >= 0:
+            _, slope, ok = _interp_packed(z, Z[chief_idx], Y[chief_idx], lengths[chief_idx])
+            if ok:
+                chief_slope[p] = slope
+    return rms, beam_width, chief_slope, y_centroid, num_rays
+
+
+def _interpolate_rays_at_z(Z, Y, lengths, z_positions):
+    """
+    Vectorized _interpolate_ray_at_z over packed rays (see _pack_rays) and many z.
+    Returns (y, slope, valid), each shaped (P, R) for P z positions and R rays.
+    """
+    z = np.asarray(z_positions, dtype=float)[:, None]
+    n_z, n_rays = z.shape[0], Z.shape[0]
+    if Z.shape[1] < 2:
+        empty = np.full((n_z, n_rays), np.nan)
+        return empty, empty.copy(), np.zeros((n_z, n_rays), dtype=bool)
+    Z0, Z1 = Z[:, :-1], Z[:, 1:]
+    dZ = Z1 - Z0
+    dY = Y[:, 1:] - Y[:, :-1]
+    flat = ~(np.abs(dZ) > 1e-12)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        seg_slope = np.where(flat, 0.0, dY / dZ)
+    has_seg = lengths >= 2
+    z_min = np.fmin.reduce(Z, axis=1)
+    z_max = np.fmax.reduce(Z, axis=1)
+
+    # First segment bracketing z; NaN padding never compares true
+    bracket = (Z0[None, :, :] <= z[:, :, None]) & (z[:, :, None] <= Z1[None, :, :])
+    hit = bracket.any(axis=2)
+    below = z <= z_min
+    above = ~below & (z >= z_max)
+    mid = ~below & ~above & hit
+    last_seg = np.maximum(lengths - 2, 0)
+    k = np.where(below, 0, np.where(above, last_seg, bracket.argmax(axis=2)))
+    anchor = np.where(above, last_seg + has_seg, k)
+
+    rows = np.arange(n_rays)[None, :]
+    slope = seg_slope[rows, k]
+    z_a = Z[rows, anchor]
+    y_a = Y[rows, anchor]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.where(flat[rows, k], 0.0, (z - z_a) / dZ[rows, k])
+    y = np.where(mid, y_a + t * dY[rows, k], y_a + slope * (z - z_a))
+    valid = has_seg[None, :] & (below | above | hit)
+    return np.where(valid, y, np.nan), np.where(valid, slope, np.nan), valid
+
+
+def _batched_metrics_sweep(z_positions, Z, Y, lengths, chief_idx):
+    """NumPy counterpart of _metrics_sweep_kernel: one broadcast pass over all z and rays."""
+    y, slope, valid = _interpolate_rays_at_z(Z, Y, lengths, z_positions)
+    num_rays = valid.sum(axis=1)
+    y0 = np.where(valid, y, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        y_centroid = y0.sum(axis=1) / num_rays
+        rms = np.sqrt(np.maximum(0.0, (y0 * y0).sum(axis=1) / num_rays - y_centroid ** 2))
+    beam_width = np.where(valid, y, -np.inf).max(axis=1, initial=-np.inf) - np.where(valid, y, np.inf).min(axis=1, initial=np.inf)
+    if chief_idx >= 0:
+        chief_slope = slope[:, chief_idx]
+    else:
+        chief_slope = np.full(len(z_positions), np.nan)
+    return rms, beam_width, chief_slope, y_centroid, num_rays
+
+
+def _rms_per_field_sweep(z_positions, rays_by_field):
+    """
+    RMS radius of every field at every z in z_positions, as a (P, F) array (NaN
+    where a field has no valid ray). Without numba all fields are interpolated in
+    one pass and reduced per field with a ray-to-field indicator matrix.
+    """
+    if _HAVE_NUMBA:
+        columns = []
+        for field_rays in rays_by_field:
+            Z, Y, lengths = _pack_rays(field_rays)
+            columns.append(_metrics_sweep_kernel(z_positions, Z, Y, lengths, -1)[0])
+        return np.column_stack(columns)
+    return _rms_per_field_packed(z_positions, _pack_fields(rays_by_field))
+
+
+def _pack_fields(rays_by_field):
+    """
+    Pack every field's rays into one _pack_rays block.
+    Returns (Z, Y, lengths, indicator) where indicator[r, f] is 1.0 if ray r is in field f.
+    """
+    field_sizes = [len(field_rays) for field_rays in rays_by_field]
+    Z, Y, lengths = _pack_rays([ray for field_rays in rays_by_field for ray in field_rays])
+    field_of_ray = np.repeat(np.arange(len(field_sizes)), field_sizes)
+    indicator = (field_of_ray[:, None] == np.arange(len(field_sizes))[None, :]).astype(float)
+    return Z, Y, lengths, indicator
+
+
+def _rms_per_field_packed(z_positions, packed_fields):
+    """(P, F) per-field RMS radius over _pack_fields output; NaN where a field has no valid ray."""
+    Z, Y, lengths, indicator = packed_fields
+    y, _, valid = _interpolate_rays_at_z(Z, Y, lengths, z_positions)
+    y0 = np.where(valid, y, 0.0)
+    counts = valid.astype(float) @ indicator
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (y0 @ indicator) / counts
+        return np.sqrt(np.maximum(0.0, ((y0 * y0) @ indicator) / counts - mean ** 2))
+
+
+def _metrics_sweep(z_positions, ray_data, packed=None, chief_idx=None):
+    """
+    Metrics for ray_data at every z in z_positions; one get_metrics_at_z-style dict per z.
+    packed: optional (Z, Y, lengths) from _pack_rays(ray_data), to avoid repacking.
+    chief_idx: optional _chief_ray_index(ray_data), to avoid recomputing it.
+    """
+    z_positions = np.asarray(z_positions, dtype=float)
+    Z, Y, lengths = packed if packed is not None else _pack_rays(ray_data)
+    if chief_idx is None:
+        chief_idx = _chief_ray_index_packed(Y, lengths)
+    sweep = _metrics_sweep_kernel if _HAVE_NUMBA else _batched_metrics_sweep
+    rms, beam_width, chief_slope, y_centroid, num_rays = sweep(
+        z_positions, Z, Y, lengths, chief_idx
+    )
+    points = []
+    for i in range(len(z_positions)):
+        if num_rays[i] == 0:
+            points.append({
+                "rmsRadius": None,
+                "beamWidth": None,
+                "chiefRayAngle": None,
+                "yCentroid": None,
+                "numRays": 0,
+            })
+            continue
+        points.append({
+            "rmsRadius": float(rms[i]),
+            "beamWidth": float(beam_width[i]),
+            "chiefRayAngle": float(np.degrees(np.arctan(chief_slope[i]))) if np.isfinite(chief_slope[i]) else None,
+            "yCentroid": float(y_centroid[i]),
+            "numRays": int(num_rays[i]),
+        })
+    return points
+
+
+def get_metrics_at_z(z_pos, ray_data, chief_idx=None):
     """
     Compute optical metrics at an arbitrary Z position by interpolating ray data.
 
     Args:
         z_pos: Z position (mm) at which to evaluate metrics
         ray_data: List of rays, each ray is [[z,y], [z,y], ...]
+        chief_idx: Optional chief-ray index (see _chief_ray_index). Pass it when
+            evaluating the same rays at many z; it does not depend on z.
 
     Returns:
         dict with rmsRadius (mm), beamWidth (mm), chiefRayAngle (degrees),
         yCentroid (mm), numRays (int). Values are None if no valid rays.
     """
+    ray_data = _rays_as_arrays(ray_data)
     interpolated = []
     for ray in ray_data:
         y, slope = _interpolate_ray_at_z(ray, z_pos)
@@ -192,7 +544,8 @@ def get_metrics_at_z(z_pos, ray_data):
     beam_width = float(np.max(y_vals) - np.min(y_vals))
 
     # Chief ray: the one starting at (0,0) in pupil = smallest |y| at first point
-    chief_idx = min(range(len(ray_data)), key=lambda i: abs(ray_data[i][0][1]) if ray_data[i] else float("inf"))
+    if chief_idx is None:
+        chief_idx = _chief_ray_index(ray_data)
     _, chief_slope = _interpolate_ray_at_z(ray_data[chief_idx], z_pos)
     chief_ray_angle = np.degrees(np.arctan(chief_slope)) if chief_slope is not None else None
 
@@ -205,19 +558,6 @@ def get_metrics_at_z(z_pos, ray_data):
     }
 
 
-def _rms_per_field_at_z(rays_by_field, z_pos):
-    """
-    Compute RMS for each field at z_pos.
-    Returns list of RMS values (one per field), using _rms_radius formula.
-    """
-    rms_per_field = []
-    for field_rays in rays_by_field:
-        m = get_metrics_at_z(z_pos, field_rays)
-        r = m.get("rmsRadius") if m else None
-        rms_per_field.append(float(r) if r is not None else float("inf"))
-    return rms_per_field
-
-
 def _global_weighted_rms(rms_per_field, weights):
     """
     RMS_global = sqrt(w1*RMS1^2 + w2*RMS2^2 + ...)
@@ -239,7 +579,7 @@ def _best_focus_golden_section(
     max_iter=80,
 ):
     """
-    Find Z that minimizes global weighted RMS using scipy minimize_scalar (golden)
+    Find Z that minimizes global weighted RMS using scipy minimize_scalar (Brent)
     or fallback Golden Section Search. Centroid-based RMS per field, not axis-based.
     focus_mode: 'On-Axis' (100% weight on field 0) or 'Balanced' (equal weights).
     """
@@ -249,19 +589,43 @@ def _best_focus_golden_section(
     else:
         weights = [1.0 / max(1, n_fields)] * n_fields
 
+    # Zero-weight fields never contribute (e.g. off-axis fields in On-Axis mode),
+    # so leave their rays out of the objective entirely
+    active = [i for i, w in enumerate(weights[:n_fields]) if w > 0 and rays_by_field[i]]
+    if not active:
+        return float(z_hi), float("inf")
+    weights = [weights[i] for i in active]
+
+    # Pack once; each objective call is then one vectorized gather over all rays
+    packed_fields = _pack_fields([rays_by_field[i] for i in active])
+
     def objective(z):
-        rms_per_field = _rms_per_field_at_z(rays_by_field, z)
+        rms = _rms_per_field_packed((z,), packed_fields)[0]
+        rms_per_field = np.where(np.isnan(rms), np.inf, rms).tolist()
         return _global_weighted_rms(rms_per_field, weights)
 
     try:
         from scipy.optimize import minimize_scalar
-        res = minimize_scalar(
-            objective,
-            bracket=(z_lo, z_hi),
-            method="golden",
-            tol=tol,
-            options={"maxiter": max_iter},
-        )
+        # RMS(z) is smooth near focus, so Brent's parabolic steps converge in far
+        # fewer evaluations than golden section. The midpoint serves as the inner
+        # bracket point when it is below both ends; otherwise scipy raises and
+        # Brent starts from the two-point bracket (downhill search) as before.
+        try:
+            res = minimize_scalar(
+                objective,
+                bracket=(z_lo, 0.5 * (z_lo + z_hi), z_hi),
+                method="brent",
+                tol=tol,
+                options={"maxiter": max_iter},
+            )
+        except ValueError:
+            res = minimize_scalar(
+                objective,
+                bracket=(z_lo, z_hi),
+                method="brent",
+                tol=tol,
+                options={"maxiter": max_iter},
+            )
         return float(res.x), float(res.fun)
     except ImportError:
         pass
@@ -291,22 +655,17 @@ def _precompute_metrics_sweep(rays, num_points=100, rays_by_field=None):
     """
     if not rays:
         return []
-    all_z = []
-    for ray in rays:
-        for pt in ray:
-            all_z.append(pt[0])
-    z_min = min(all_z)
-    z_max = max(all_z)
+    packed = _pack_rays(rays)
+    z_min = float(np.nanmin(packed[0]))
+    z_max = float(np.nanmax(packed[0]))
     if z_max <= z_min:
         z_max = z_min + 1.0
     z_positions = np.linspace(z_min, z_max, num_points)
-    result = []
-    for z in z_positions:
-        pt = {"z": float(z), **get_metrics_at_z(z, rays)}
-        if rays_by_field and len(rays_by_field) > 0:
-            rms_per = _rms_per_field_at_z(rays_by_field, z)
-            pt["rmsPerField"] = [float(r) if r < 1e10 else None for r in rms_per]
-        result.append(pt)
+    result = [{"z": float(z), **m} for z, m in zip(z_positions, _metrics_sweep(z_positions, rays, packed))]
+    if rays_by_field and len(rays_by_field) > 0:
+        rms_per_field = _rms_per_field_sweep(z_positions, rays_by_field)
+        for pt, row in zip(result, rms_per_field.tolist()):
+            pt["rmsPerField"] = [None if np.isnan(r) else r for r in row]
     return result
 
 
@@ -320,30 +679,88 @@ def optical_stack_to_surf_data(surfaces, wvl_nm=587.6):
     Object space is assumed n=1 (air).
     If surface has coating='HR', uses 'REFL' so rayoptics treats it as a mirror.
     """
+    return optical_stack_to_surf_data_multi(surfaces, [wvl_nm])[0]
+
+
+def _precompile_surfaces(surfaces):
+    """
+    Resolve the wavelength-independent part of the surf_data conversion once.
+    Returns one (curvature, thickness, sellmeier, n_const, is_glass) tuple per
+    surface; sellmeier and n_const are both None for an HR (mirror) surface.
+    """
     from coating_engine import is_hr_coating
-    from glass_materials import refractive_index_at_wavelength, n_from_sellmeier
+    from glass_materials import material_dispersion
 
-    surf_data_list = []
+    compiled = []
     for s in surfaces:
         r = float(s.get("radius", 0) or 0)
         t = float(s.get("thickness", 0) or 0)
-        coating = s.get("coating") or ""
-        if is_hr_coating(coating):
-            curvature = 1.0 / r if r != 0 else 0.0
-            v = 0.0
-            surf_data_list.append([curvature, t, "REFL", v])
+        curvature = 1.0 / r if r != 0 else 0.0
+        if is_hr_coating(s.get("coating") or ""):
+            compiled.append((curvature, t, None, None, False))
             continue
         n_fallback = float(s.get("refractiveIndex", 1) or 1)
-        material = s.get("material") or ""
-        sellmeier = s.get("sellmeierCoefficients")
-        if sellmeier and isinstance(sellmeier, dict):
-            n = n_from_sellmeier(wvl_nm, sellmeier)
+        sellmeier, n_const = s.get("sellmeierCoefficients"), None
+        if not (sellmeier and isinstance(sellmeier, dict)):
+            sellmeier, n_const = material_dispersion(s.get("material") or "", n_fallback)
+        compiled.append((curvature, t, sellmeier, n_const, s.get("type") == "Glass"))
+    return compiled
+
+
+def optical_stack_to_surf_data_multi(surfaces, wavelengths):
+    """
+    optical_stack_to_surf_data for many wavelengths at once (the single-wavelength
+    form is built on this). Surfaces are resolved once (see _precompile_surfaces)
+    and n(λ) is evaluated for all wavelengths in one vectorized Sellmeier pass
+    per glass. Returns one surf_data_list per wavelength.
+    """
+    from glass_materials import n_from_sellmeier_array
+
+    wvls = np.asarray(wavelengths, dtype=float)
+    columns = []  # per surface: (curvature, thickness, n per wavelength or None for "REFL", is_glass)
+    for curvature, t, sellmeier, n_const, is_glass in _precompile_surfaces(surfaces):
+        if sellmeier is not None:
+            n = n_from_sellmeier_array(wvls, sellmeier).tolist()
+        elif n_const is not None:
+            n = [n_const] * len(wvls)
         else:
-            n = refractive_index_at_wavelength(wvl_nm, material, n_fallback)
-        curvature = 1.0 / r if r != 0 else 0.0
-        v = 64.2 if (s.get("type") == "Glass" and n > 1.01) else 0.0
-        surf_data_list.append([curvature, t, n, v])
-    return surf_data_list
+            n = None
+        columns.append((curvature, t, n, is_glass))
+
+    return [
+        [
+            [curvature, t, "REFL", 0.0] if n is None
+            else [curvature, t, n[w], 64.2 if (is_glass and n[w] > 1.01) else 0.0]
+            for curvature, t, n, is_glass in columns
+        ]
+        for w in range(len(wvls))
+    ]
+
+
+@functools.lru_cache(maxsize=1024)
+def _chromatic_bfl(surf_key, wvl_nm, epd, diam_key):
+    """
+    Paraxial BFL (mm) at one wavelength for run_chromatic_shift, memoized on its
+    hashable inputs so re-running the analysis on an unchanged lens (or an
+    overlapping wavelength range) skips the model builds. NaN if the build fails.
+    """
+    from singlet_rayoptics import INFINITE_OBJECT_DISTANCE, build_singlet_from_surface_data, get_focal_length
+
+    try:
+        opt_model = build_singlet_from_surface_data(
+            [list(row) for row in surf_key],
+            wvl_nm=wvl_nm,
+            radius_mode=False,
+            object_distance=INFINITE_OBJECT_DISTANCE,
+            epd=epd,
+            surface_diameters=list(diam_key),
+        )
+        opt_model.update_model()
+        opt_model.optical_spec.update_optical_properties()
+        _, fod = get_focal_length(opt_model)
+        return float(fod.bfl) if (fod and np.isfinite(fod.bfl)) else float("nan")
+    except Exception:
+        return float("nan")
 
 
 def run_chromatic_shift(
@@ -358,14 +775,12 @@ def run_chromatic_shift(
 
     Returns list of { wavelength: float, focus_shift: float } in mm.
     """
-    from singlet_rayoptics import build_singlet_from_surface_data, get_focal_length
-
     surfaces = optical_stack.get("surfaces", [])
     if not surfaces:
         return []
 
     epd = float(optical_stack.get("entrancePupilDiameter", 10) or 10)
-    surface_diameters = [float(s.get("diameter", 25) or 25) for s in surfaces]
+    diam_key = tuple(float(s.get("diameter", 25) or 25) for s in surfaces)
 
     wavelengths = []
     w = wavelength_min_nm
@@ -374,34 +789,48 @@ def run_chromatic_shift(
         w += wavelength_step_nm
 
     result = []
-    for wvl_nm in wavelengths:
-        surf_data_list = optical_stack_to_surf_data(surfaces, wvl_nm=wvl_nm)
-        try:
-            opt_model = build_singlet_from_surface_data(
-                surf_data_list,
-                wvl_nm=wvl_nm,
-                radius_mode=False,
-                object_distance=1e10,
-                epd=epd,
-                surface_diameters=surface_diameters,
-            )
-            opt_model.update_model()
-            opt_model.optical_spec.update_optical_properties()
-            _, fod = get_focal_length(opt_model)
-            bfl = fod.bfl if (fod and np.isfinite(fod.bfl)) else float("nan")
-            result.append({"wavelength": float(wvl_nm), "focus_shift": float(bfl)})
-        except Exception:
-            result.append({"wavelength": float(wvl_nm), "focus_shift": float("nan")})
+    for wvl_nm, surf_data_list in zip(wavelengths, optical_stack_to_surf_data_multi(surfaces, wavelengths)):
+        bfl = _chromatic_bfl(tuple(map(tuple, surf_data_list)), wvl_nm, epd, diam_key)
+        result.append({"wavelength": float(wvl_nm), "focus_shift": bfl})
 
     return result
 
 
+@functools.lru_cache(maxsize=16)
+def _build_trace_model(surf_key, wvl_nm, epd, diam_key, field_key):
+    """
+    Memoized model build and field-of-view setup for run_trace, keyed on hashable
+    inputs (surf_data_list rows, diameters and field angles as tuples). Returns
+    (opt_model, lock): the model is shared between calls, so hold the lock while
+    tracing it and never change its prescription.
+    """
+    from singlet_rayoptics import INFINITE_OBJECT_DISTANCE, build_singlet_from_surface_data
+
+    opt_model = build_singlet_from_surface_data(
+        [list(row) for row in surf_key],
+        wvl_nm=wvl_nm,
+        radius_mode=False,
+        object_distance=INFINITE_OBJECT_DISTANCE,
+        epd=epd,
+        surface_diameters=list(diam_key),
+    )
+    # Configure field of view from fieldAngles (degrees)
+    if field_key:
+        fov = opt_model.optical_spec.field_of_view
+        fov.set_from_list(list(field_key))
+        if fov.value == 0:
+            fov.value = 1.0  # ensure non-zero max for single on-axis field
+        opt_model.update_model()
+        opt_model.optical_spec.update_optical_properties()
+    return opt_model, threading.Lock()
+
+
 def run_trace(optical_stack: dict) -> dict:
     """
     Run ray trace on optical_stack from frontend.
     Returns: { rays, surfaces, focusZ, performance, gaussianBeam? }
     """
-    from singlet_rayoptics import build_singlet_from_surface_data, get_focal_length, run_spot_diagram
+    from singlet_rayoptics import _trace_chunk, get_focal_length, pupil_grid, run_spot_diagram
     from gaussian_beam import compute_gaussian_beam
 
     surfaces = optical_stack.get("surfaces", [])
@@ -421,118 +850,122 @@ def run_trace(optical_stack: dict) -> dict:
     surf_data_list = optical_stack_to_surf_data(surfaces, wvl_nm=wvl_nm)
     surface_diameters = [float(s.get("diameter", 25) or 25) for s in surfaces]  # diameter in mm
 
+    # Cached across calls: re-tracing the same lens (e.g. only numRays or focusMode
+    # changed) reuses the built model instead of rebuilding it
     try:
-        opt_model = build_singlet_from_surface_data(
-            surf_data_list,
-            wvl_nm=wvl_nm,
-            radius_mode=False,
-            object_distance=1e10,
-            epd=epd,
-            surface_diameters=surface_diameters,
+        opt_model, model_lock = _build_trace_model(
+            tuple(map(tuple, surf_data_list)),
+            wvl_nm,
+            epd,
+            tuple(surface_diameters),
+            tuple(float(a) for a in field_angles or ()),
         )
     except Exception as e:
         return {"error": str(e), "rays": [], "rayPower": [], "surfaces": [], "focusZ": 0, "bestFocusZ": 0, "metricsSweep": []}
 
-    # Configure field of view from fieldAngles (degrees)
-    osp = opt_model.optical_spec
-    fov = osp.field_of_view
-    if field_angles and len(field_angles) > 0:
-        fov.set_from_list([float(a) for a in field_angles])
-        if fov.value == 0:
-            fov.value = 1.0  # ensure non-zero max for single on-axis field
-        opt_model.update_model()
-        opt_model.optical_spec.update_optical_properties()
-
-    sm = opt_model.seq_model
-    tfrms = sm.gbl_tfrms
-    osp = opt_model.optical_spec
-    z_origin = tfrms[1][1][2] if len(tfrms) > 1 else 0
-
-    # Focal point
-    efl, fod = get_focal_length(opt_model)
-    bfl = fod.bfl if (fod and fod.efl != 0) else 50.0
-    if not np.isfinite(bfl):
-        bfl = 50.0
-    last_surf_z = tfrms[-2][1][2] if len(tfrms) >= 2 else tfrms[-1][1][2]
-    focus_z = last_surf_z + bfl - z_origin
-
-    # Lens surface curves (2D profiles in z,y)
-    surface_curves = []
-    for i, ifc in enumerate(sm.ifcs):
-        if i >= len(tfrms):
-            break
-        if ifc.interact_mode == "dummy":
-            continue
-        try:
-            sd = ifc.surface_od()
-        except Exception:
-            sd = epd / 2.0
-        if sd <= 0:
-            sd = epd / 2.0
-        sd = min(sd, 100.0)
-        pts = _profile_points(ifc, sd)
-        if pts is None or len(pts) < 2:
-            continue
-        rot, trns = tfrms[i]
-        gbl = _transform_profile(pts, rot, trns)
-        gbl[:, 0] -= z_origin
-        surface_curves.append([[float(p[0]), float(p[1])] for p in gbl])
-
     # Power loss from coatings: R(λ) per surface, P_new = P_old × (1 - R)
     from coating_engine import get_reflectivity, is_hr_coating, reflectivity_from_surface, is_hr_from_surface
 
-    # Ray polylines — trace each field separately for field-weighted focus
-    grid_def = [np.array([-1.0, -1.0]), np.array([1.0, 1.0]), num_rays]
-    pupil_coords = list(sampler.grid_ray_generator(grid_def))
-    extend_left = 50.0
-    rays_by_field = []
-    rays = []
-    ray_field_indices = []
-    ray_power = []  # transmitted power (0..1) at end of each ray
-    for fld_idx, fld_obj in enumerate(osp.field_of_view.fields):
-        ray_list = analyses.trace_ray_list(
-            opt_model, pupil_coords, fld_obj, wvl_nm, foc=0.0, check_apertures=True
-        )
-        field_rays = []
-        for _, _, ray_result in ray_list:
-            if ray_result is None:
+    # Per-surface attenuation at this wavelength. Transmit: P_new = P_old × (1 - R).
+    # HR (reflect): P_new = P_old × R (we follow the reflected ray). cum_atten[k] is
+    # the power left after the first k surfaces.
+    # Library lookups read user coatings from the database, so do each distinct
+    # coating once per trace (not cached across traces: user coatings can change).
+    by_coating = {}  # coating name -> (R, is_hr) from the library
+    atten = np.empty(len(surfaces))
+    for surf_idx, surf in enumerate(surfaces):
+        coating = surf.get("coating") or ""
+        if coating not in by_coating:
+            by_coating[coating] = (get_reflectivity(coating, wvl_nm), is_hr_coating(coating))
+        r_lib, hr_lib = by_coating[coating]
+        r_inline = reflectivity_from_surface(surf, wvl_nm)
+        r = r_inline if r_inline is not None else r_lib
+        hr = is_hr_from_surface(surf)
+        is_hr = hr if hr is not None else hr_lib
+        atten[surf_idx] = r if is_hr else 1.0 - r
+    cum_atten = np.concatenate([[1.0], np.cumprod(atten)])
+
+    # The cached model is shared by concurrent traces of the same lens, and rayoptics
+    # caches trace state on it (e.g. per-field chief rays), so use it one trace at a time
+    with model_lock:
+        sm = opt_model.seq_model
+        tfrms = sm.gbl_tfrms
+        stacked_tfrms = _stack_tfrms(tfrms)  # shared by every ray polyline below
+        osp = opt_model.optical_spec
+        z_origin = tfrms[1][1][2] if len(tfrms) > 1 else 0
+
+        # Focal point
+        efl, fod = get_focal_length(opt_model)
+        bfl = fod.bfl if (fod and fod.efl != 0) else 50.0
+        if not np.isfinite(bfl):
+            bfl = 50.0
+        last_surf_z = tfrms[-2][1][2] if len(tfrms) >= 2 else tfrms[-1][1][2]
+        focus_z = last_surf_z + bfl - z_origin
+
+        # Lens surface curves (2D profiles in z,y)
+        profiles = []
+        profile_tfrms = []
+        for i, ifc in enumerate(sm.ifcs):
+            if i >= len(tfrms):
+                break
+            if ifc.interact_mode == "dummy":
                 continue
-            ray = ray_result[mc.ray]
-            poly = _ray_to_polyline(
-                ray,
-                tfrms,
-                extend_parallel_back=extend_left,
-                extend_to_focus=True,
-                focus_z=focus_z,
-                z_origin=z_origin,
-            )
-            if len(poly) > 1:
-                field_rays.append(poly)
-                rays.append(poly)
-                ray_field_indices.append(fld_idx)
-                # Power: at each surface crossing
-                # Transmit: P_new = P_old × (1 - R). HR (reflect): P_new = P_old × R (we follow reflected ray)
-                p = 1.0
-                n_seg = len(ray)
-                for seg_idx in range(1, n_seg):
-                    surf_idx = seg_idx - 1
-                    if surf_idx < len(surfaces):
-                        surf = surfaces[surf_idx]
-                        coating = surf.get("coating") or ""
-                        r_inline = reflectivity_from_surface(surf, wvl_nm)
-                        r = r_inline if r_inline is not None else get_reflectivity(coating, wvl_nm)
-                        hr = is_hr_from_surface(surf)
-                        is_hr = hr if hr is not None else is_hr_coating(coating)
-                        if is_hr:
-                            p *= r  # reflected ray carries R fraction
-                        else:
-                            p *= 1.0 - r  # transmitted ray
-                ray_power.append(float(p))
-        rays_by_field.append(field_rays)
-
-    # Performance
-    spot_xy, dxdy = run_spot_diagram(opt_model, num_rays=num_rays, fld=0, wvl=wvl_nm)
-    valid = ~np.isnan(dxdy[:, 0])
+            try:
+                sd = ifc.surface_od()
+            except Exception:
+                sd = epd / 2.0
+            if sd <= 0:
+                sd = epd / 2.0
+            sd = min(sd, 100.0)
+            pts = _profile_points(ifc, sd)
+            if pts is None or len(pts) < 2:
+                continue
+            profiles.append(pts)
+            profile_tfrms.append(tfrms[i])
+        surface_curves = []
+        if profiles:
+            for gbl in _transform_profiles(profiles, profile_tfrms, z_offset=z_origin):
+                surface_curves.append(gbl.tolist())
+
+        # Ray polylines — trace each field separately for field-weighted focus
+        pupil_coords = pupil_grid(num_rays)
+        extend_left = 50.0
+        rays_by_field = []
+        rays = []
+        ray_field_indices = []
+        ray_power = []  # transmitted power (0..1) at end of each ray
+        on_axis_ray_list = None  # field 0 trace, reused for the spot diagram
+        for fld_idx, fld_obj in enumerate(osp.field_of_view.fields):
+            ray_list = _trace_chunk(opt_model, pupil_coords, fld_obj, wvl_nm, 0.0)
+            if fld_idx == 0:
+                on_axis_ray_list = ray_list
+            field_rays = []
+            for _, _, ray_result in ray_list:
+                if ray_result is None:
+                    continue
+                ray = ray_result[mc.ray]
+                poly = _ray_to_polyline(
+                    ray,
+                    tfrms,
+                    extend_parallel_back=extend_left,
+                    extend_to_focus=True,
+                    focus_z=focus_z,
+                    z_origin=z_origin,
+                    stacked_tfrms=stacked_tfrms,
+                )
+                if len(poly) > 1:
+                    field_rays.append(poly)
+                    rays.append(poly)
+                    ray_field_indices.append(fld_idx)
+                    # Power: product of attenuations over the surfaces this ray crossed
+                    ray_power.append(float(cum_atten[min(len(ray) - 1, len(surfaces))]))
+            rays_by_field.append(field_rays)
+
+        # Performance
+        # Same grid, field 0, wavelength and focus as the trace above, so reuse its rays
+        spot_xy, dxdy, valid = run_spot_diagram(
+            opt_model, num_rays=num_rays, fld=0, wvl=wvl_nm, ray_list=on_axis_ray_list
+        )
     rms_x = float(np.sqrt(np.nanmean(dxdy[valid, 0] ** 2))) if np.any(valid) else 0.0
     rms_y = float(np.sqrt(np.nanmean(dxdy[valid, 1] ** 2))) if np.any(valid) else 0.0
     rms_spot_radius = float(np.sqrt(rms_x**2 + rms_y**2))
@@ -573,7 +1006,7 @@ def run_trace(optical_stack: dict) -> dict:
         pass
 
     result = {
-        "rays": rays,
+        "rays": [ray.tolist() for ray in rays],
         "rayFieldIndices": ray_field_indices,
         "rayPower": ray_power,
         "surfaces": surface_curves,
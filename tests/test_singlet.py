@@ -1,5 +1,10 @@
 """Integration tests for singlet_rayoptics."""
 import logging
+import os
+import pickle
+import time
+
+import numpy as np
 import pytest
 
 logger = logging.getLogger(__name__)
@@ -10,8 +15,11 @@ try:
         build_singlet_from_surface_data,
         get_focal_length,
         calculate_and_format_results,
+        get_ray_trace_table,
         run_spot_diagram,
+        set_entrance_pupil,
     )
+    from backend import singlet_rayoptics
     RAYOPTICS_AVAILABLE = True
 except ImportError:
     RAYOPTICS_AVAILABLE = False
@@ -51,12 +59,186 @@ class TestBuildSinglet:
         assert "BFL" in result or "Back focal" in result
         logger.info("calculate_and_format_results returns %d chars", len(result))
 
+    def test_calculate_and_format_reuses_cached_model(self, simple_singlet_data):
+        result1, model1 = calculate_and_format_results(
+            simple_singlet_data, wvl_nm=587.6, return_opt_model=True
+        )
+        result2, model2 = calculate_and_format_results(
+            [list(row) for row in simple_singlet_data], wvl_nm=587.6, return_opt_model=True
+        )
+        assert model1 is model2
+        assert result1 == result2
+
+    def test_set_entrance_pupil_matches_rebuild(self, simple_singlet_data):
+        opt_model = build_singlet_from_surface_data(
+            simple_singlet_data, wvl_nm=587.6, epd=10.0
+        )
+        set_entrance_pupil(opt_model, 5.0)
+        rebuilt = build_singlet_from_surface_data(
+            simple_singlet_data, wvl_nm=587.6, epd=5.0
+        )
+        _, fod = get_focal_length(opt_model)
+        _, fod_rebuilt = get_focal_length(rebuilt)
+        assert fod.fno == pytest.approx(fod_rebuilt.fno)
+        assert fod.efl == pytest.approx(fod_rebuilt.efl)
+
     def test_spot_diagram_shape(self, simple_singlet_data):
         opt_model = build_singlet_from_surface_data(
             simple_singlet_data, wvl_nm=587.6
         )
-        spot_xy, dxdy = run_spot_diagram(opt_model, num_rays=9)
+        spot_xy, dxdy, valid = run_spot_diagram(opt_model, num_rays=9)
         assert spot_xy.shape[0] > 0
         assert spot_xy.shape[1] == 2
         assert dxdy.shape == spot_xy.shape
+        assert valid.shape == (spot_xy.shape[0],)
         logger.info("Spot diagram: %d rays", spot_xy.shape[0])
+
+
+class TestPupilGrid:
+    """pupil_grid replaces rayoptics' sampler.grid_ray_generator and is shared via a cache."""
+
+    @pytest.mark.parametrize("num_rays", [2, 3, 9, 21])
+    def test_matches_grid_ray_generator(self, num_rays):
+        from rayoptics.raytr import sampler
+        grid_def = [np.array([-1., -1.]), np.array([1., 1.]), num_rays]
+        expected = np.array(list(sampler.grid_ray_generator(grid_def)), dtype=float)
+        np.testing.assert_array_equal(singlet_rayoptics.pupil_grid(num_rays), expected)
+
+    def test_cached_grid_is_read_only(self):
+        grid = singlet_rayoptics.pupil_grid(5)
+        assert singlet_rayoptics.pupil_grid(5) is grid
+        assert not grid.flags.writeable
+        with pytest.raises(ValueError):
+            grid[0, 0] = 0.0
+
+
+def _baseline_ray_trace_table(opt_model, num_rays, round_values=True):
+    """get_ray_trace_table as it was before vectorizing: one dict per ray, built in a loop."""
+    from rayoptics.optical import model_constants as mc
+    from rayoptics.raytr import analyses, sampler, trace
+
+    def rnd(value, places):
+        return round(value, places) if round_values else value
+
+    osp = opt_model.optical_spec
+    fld_obj = osp.field_of_view.fields[0]
+    wvl = osp.spectral_region.central_wvl
+    tfrms = opt_model.seq_model.gbl_tfrms
+    grid_def = [np.array([-1., -1.]), np.array([1., 1.]), num_rays]
+    pupil_coords = list(sampler.grid_ray_generator(grid_def))
+    ray_list = analyses.trace_ray_list(opt_model, pupil_coords, fld_obj, wvl, 0.0, check_apertures=True)
+    ray_list_data = analyses.focus_pupil_coords(opt_model, ray_list, fld_obj, wvl, 0.0)
+    ref_sphere, _ = trace.setup_pupil_coords(opt_model, fld_obj, wvl, 0.0)
+    dxdy = np.array([r[:2] for r in ray_list_data])
+    spot_xy = ref_sphere[0][:2] + dxdy
+
+    rows = []
+    for idx, (_, _, ray_result) in enumerate(ray_list):
+        if ray_result is None:
+            continue
+        px, py = pupil_coords[idx]
+        ray = ray_result[mc.ray]
+        if len(ray) < 2 or idx >= len(spot_xy):
+            continue
+        rot, trns = tfrms[1]
+        y_s1 = (rot.dot(ray[1][mc.p]) + trns)[1]
+        d_glob = rot.dot(ray[1][mc.d])
+        slope = (d_glob[1] / d_glob[2]) if abs(d_glob[2]) > 1e-12 else np.nan
+        angle_deg = np.degrees(np.arctan(slope)) if np.isfinite(slope) else np.nan
+        rows.append({
+            "Ray": idx + 1,
+            "Pupil X": rnd(px, 4),
+            "Pupil Y": rnd(py, 4),
+            "Y at S1 (mm)": rnd(y_s1, 4),
+            "Slope (1/mm)": rnd(slope, 6) if np.isfinite(slope) else np.nan,
+            "Angle (deg)": rnd(angle_deg, 4) if np.isfinite(angle_deg) else np.nan,
+            "Spot X (mm)": rnd(spot_xy[idx, 0], 6),
+            "Spot Y (mm)": rnd(spot_xy[idx, 1], 6),
+            "Trans DX (mm)": rnd(dxdy[idx, 0], 6),
+            "Trans DY (mm)": rnd(dxdy[idx, 1], 6),
+        })
+    return rows
+
+
+class TestRayTraceTable:
+    """The vectorized get_ray_trace_table must reproduce the original per-ray table."""
+
+    @pytest.fixture
+    def model(self, simple_singlet_data):
+        return build_singlet_from_surface_data(simple_singlet_data, wvl_nm=587.6)
+
+    @pytest.mark.parametrize("round_values", [True, False])
+    def test_matches_baseline(self, model, round_values):
+        """Rows and as_columns=True both match the baseline rows."""
+        expected = _baseline_ray_trace_table(model, 5, round_values=round_values)
+        rows = get_ray_trace_table(model, num_rays=5, round_values=round_values)
+        assert len(rows) == len(expected) > 0
+        for row, exp in zip(rows, expected):
+            assert list(row) == list(exp)
+            np.testing.assert_allclose(
+                [row[name] for name in exp], [exp[name] for name in exp],
+                rtol=0, atol=1e-12, equal_nan=True,
+            )
+
+        columns = get_ray_trace_table(model, num_rays=5, round_values=round_values, as_columns=True)
+        assert list(columns) == list(expected[0])
+        for name, values in columns.items():
+            assert isinstance(values, np.ndarray) and values.shape == (len(expected),)
+            np.testing.assert_allclose(
+                values, [exp[name] for exp in expected], rtol=0, atol=1e-12, equal_nan=True,
+            )
+
+
+@pytest.fixture
+def parallel_pool(monkeypatch):
+    """Force the pool path for small grids on any host; shut the pool down afterwards."""
+    monkeypatch.setattr(singlet_rayoptics, "PARALLEL_MIN_RAYS", 4)
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    yield
+    if singlet_rayoptics._pool is not None:
+        singlet_rayoptics._pool.shutdown(wait=True)
+        singlet_rayoptics._pool = None
+
+
+class TestParallelTrace:
+    """The process-pool trace must match the sequential one and recover from failures."""
+
+    @pytest.fixture
+    def model(self, simple_singlet_data):
+        opt_model = build_singlet_from_surface_data(simple_singlet_data, wvl_nm=587.6)
+        try:
+            pickle.dumps(opt_model)
+        except Exception:
+            pytest.skip("OpticalModel is not picklable with this rayoptics version")
+        return opt_model
+
+    def _assert_same_spots(self, opt_model):
+        serial = run_spot_diagram(opt_model, num_rays=9, parallel=False)
+        pooled = run_spot_diagram(opt_model, num_rays=9)
+        for a, b in zip(serial, pooled):
+            np.testing.assert_array_equal(a, b)
+
+    def test_pool_matches_serial(self, parallel_pool, model):
+        self._assert_same_spots(model)
+        assert singlet_rayoptics._pool is not None
+
+    def test_parallel_false_skips_pool(self, parallel_pool, model):
+        run_spot_diagram(model, num_rays=9, parallel=False)
+        assert singlet_rayoptics._pool is None
+
+    def test_unpicklable_model_falls_back(self, parallel_pool, model, monkeypatch):
+        def fail(*args, **kwargs):
+            raise pickle.PicklingError("unpicklable")
+        monkeypatch.setattr(singlet_rayoptics.pickle, "dumps", fail)
+        self._assert_same_spots(model)
+        assert singlet_rayoptics._pool is None
+
+    def test_broken_pool_recovers(self, parallel_pool, model):
+        run_spot_diagram(model, num_rays=9)
+        broken = singlet_rayoptics._pool
+        for proc in list(broken._processes.values()):
+            proc.kill()
+            proc.join()
+        time.sleep(0.2)
+        self._assert_same_spots(model)
+        assert singlet_rayoptics._pool is not broken